@@ -1,5 +1,5 @@
 from microcosm.config.validation import required, typed
-from microcosm.decorators import binding, defaults
+from microcosm.decorators import binding, defaults, depends_on
 from microcosm.loaders import load_each, load_from_dict, load_from_environ
 from microcosm.object_graph import create_object_graph, get_component_name
 
@@ -9,6 +9,7 @@ __all__ = [
     "create_object_graph",
     "get_component_name",
     "defaults",
+    "depends_on",
     "load_each",
     "load_from_dict",
     "load_from_environ",
@@ -2,8 +2,9 @@
 Configuration API.
 
 """
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from microcosm.config.cache import ConfigurationCache
 from microcosm.config.model import Configuration
 from microcosm.config.validation import validate
 from microcosm.metadata import Metadata
@@ -14,6 +15,10 @@ def configure(
     defaults: Dict[str, Any],
     metadata: Metadata,
     loader: Loader,
+    cache: Optional[ConfigurationCache] = None,
+    freeze: bool = False,
+    strict: bool = False,
+    validation: bool = True,
 ) -> Configuration:
     """
     Build a fresh configuration.
@@ -21,9 +26,32 @@ def configure(
     :params defaults: a nested dictionary of keys and their default values
     :params metadata: the graph metadata
     :params loader: a configuration loader
+    :params cache: an optional cache used to memoize merging and validation
+    :params freeze: if true, the validated configuration is made immutable
+    :params strict: if true, lazy requirements and deferred values are validated eagerly
+    :params validation: if false, validation is skipped (and left to the caller)
 
     """
+    data = loader(metadata)
+
+    if cache is not None:
+        # NB: configuration that is validated lazily must remain mutable
+        freeze = freeze or (cache.freeze and validation)
+
+        key = cache.key_for(defaults, metadata, data, freeze, strict, validation)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     config = Configuration(defaults)
-    config.merge(loader(metadata))
-    validate(defaults, metadata, config)
+    config.merge(data)
+    if validation:
+        validate(defaults, metadata, config, strict=strict)
+
+    if freeze:
+        config.freeze()
+
+    if cache is not None:
+        cache.put(key, (defaults, data), config)
+
     return config
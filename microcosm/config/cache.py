@@ -0,0 +1,129 @@
+"""
+Configuration memoization.
+
+Building a configuration merges loaded data into the (copied) defaults and then
+validates the result. When the same defaults, metadata, and loader output are
+configured repeatedly (e.g. across many tests), this work can be reused.
+
+"""
+from copy import deepcopy
+from typing import Any, Dict, Tuple
+
+from microcosm.config.model import Configuration
+from microcosm.metadata import Metadata
+
+
+METADATA_FLAGS = (
+    "name",
+    "debug",
+    "testing",
+    "import_name",
+    "root_path",
+)
+
+
+def freeze_value(value: Any) -> Any:
+    """
+    Compute a hashable, structural representation of a (possibly nested) value.
+
+    Dictionaries and sequences are compared by content; any other unhashable value
+    (and any `Requirement`, whose behavior cannot be compared structurally) is compared
+    by identity.
+
+    """
+    if isinstance(value, dict):
+        return (dict, tuple(
+            (freeze_value(key), freeze_value(item))
+            for key, item in dict.items(value)
+        ))
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(freeze_value(item) for item in value))
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        # NB: include the type so that (e.g.) `True` and `1` are not conflated
+        return (type(value), value)
+    return (type(value), id(value))
+
+
+class ConfigurationCache:
+    """
+    Memoize `configure()` results.
+
+    Results are keyed by a structural hash of the defaults, the metadata flags, and
+    the loader output; the loader itself is still invoked on every call.
+
+    By default, cached configurations are frozen (see `Configuration.freeze()`) and shared
+    as-is; a hit costs little more than computing the key. Validated configurations are
+    frozen even if `configure()` was not asked to freeze them.
+
+    With `freeze=False`, mutable configurations are never handed out directly: callers
+    receive a deep copy so that mutating one configuration cannot corrupt another. A deep
+    copy costs about as much as merging and validating simple defaults, so this only pays
+    off when validation is expensive (e.g. costly `Requirement` types).
+
+    Note that values produced by a `Requirement`'s `default_factory` are computed once
+    per cache entry.
+
+    """
+    def __init__(self, freeze: bool = True) -> None:
+        """
+        :param freeze: freeze (and share) validated configurations
+
+        """
+        self.freeze = freeze
+        self.entries: Dict[Any, Tuple[Any, Configuration]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def key_for(
+        self,
+        defaults: Dict[str, Any],
+        metadata: Metadata,
+        data: Dict[Any, Any],
+        freeze: bool = False,
+        strict: bool = False,
+        validation: bool = True,
+    ) -> Any:
+        return (
+            freeze_value(defaults),
+            tuple(getattr(metadata, flag) for flag in METADATA_FLAGS),
+            freeze_value(data),
+            freeze,
+            strict,
+            validation,
+        )
+
+    def get(self, key: Any) -> Any:
+        try:
+            _, config = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return config if config.is_frozen() else deepcopy(config)
+
+    def put(self, key: Any, inputs: Any, config: Configuration) -> Configuration:
+        # NB: retain the inputs so that identity-based parts of the key stay valid
+        self.entries[key] = (inputs, config if config.is_frozen() else deepcopy(config))
+        return config
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __str__(self) -> str:
+        return "{} entries, {} hits, {} misses ({:.1%} hit rate)".format(
+            len(self),
+            self.hits,
+            self.misses,
+            self.hit_rate,
+        )
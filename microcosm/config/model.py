@@ -2,12 +2,69 @@
 Configuration modeling, loading, and validation.
 
 """
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from warnings import warn
+from weakref import ref
 
 from microcosm.config.sentinel import UNSET
 from microcosm.config.types import boolean
-from microcosm.errors import ValidationError
+from microcosm.errors import FrozenConfigurationError, ValidationError
+
+
+# distinguishes missing paths from `None` values
+_MISSING = object()
+
+
+class Deferred:
+    """
+    A configuration value that is computed (once) on first access.
+
+    Loaders may return deferred values for expensive configuration (e.g. secrets that
+    must be decrypted); validation of lazy requirements also produces deferred values.
+
+    """
+    __slots__ = ("func", "args", "kwargs", "value")
+
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.value: Any = UNSET
+
+    def resolve(self) -> Any:
+        if self.value is UNSET:
+            self.value = self.func(*self.args, **self.kwargs)
+        return self.value
+
+    def __copy__(self) -> "Deferred":
+        # NB: copies share the computed value
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "Deferred":
+        return self
+
+    def __reduce__(self):
+        # NB: functions are not (generally) serializable; serialize the computed value instead
+        return (_resolved, (self.resolve(), ))
+
+    def __repr__(self) -> str:
+        if self.value is UNSET:
+            return "<deferred value>"
+        return "<deferred value: {!r}>".format(self.value)
+
+
+def _resolved(value: Any) -> Any:
+    return value
 
 
 class Configuration(Dict[Any, Any]):
@@ -20,7 +77,24 @@ class Configuration(Dict[Any, Any]):
     Note that some dict functions (`update`, `pop`) are not correctly implemented,
     but are also not needed (yet).
 
+    A configuration may be frozen (see `freeze()`), after which it is deeply immutable
+    and hashable.
+
+    Deep values may be read using a (lazily built) index of key paths (see `get_path()`);
+    nested configurations keep a reference to their parent so that mutations at any
+    depth invalidate the index.
+
+    `Deferred` values are resolved (and replaced) on first access via attribute, item,
+    `get()`, or `get_path()` lookups; bulk accessors (`items()`, `values()`, `copy()`,
+    iteration-based copies such as `dict(config)` and `**config`) and comparisons resolve
+    all of a configuration's (top-level) deferred values first.
+
     """
+    _frozen = False
+    _hash: Optional[int] = None
+    _parent: Optional["ref[Configuration]"] = None
+    _path_index: Optional[Dict[Any, Any]] = None
+
     def __init__(
         self,
         dct: Optional[Dict[Any, Any]] = None,
@@ -31,53 +105,296 @@ class Configuration(Dict[Any, Any]):
         if kwargs:
             dct.update(**kwargs)
 
-        for key, value in dct.items():
+        # NB: preserve deferred values
+        for key, value in dict.items(dct):
             setattr(self, key, value)
 
     def __setattr__(self, name: str, value) -> None:
+        self._check_mutable()
+        self._assign(name, self._wrap(value))
+
+    def __getattr__(self, name: str) -> Any:
+        # NB: only invoked for keys that are not (yet) attributes, i.e. deferred values
+        try:
+            value = super(Configuration, self).__getitem__(name)
+        except KeyError:
+            raise AttributeError(name)
+        if isinstance(value, Deferred):
+            return self._resolve(name, value)
+        return value
+
+    def __getitem__(self, key: Any) -> Any:
+        value = super(Configuration, self).__getitem__(key)
+        if isinstance(value, Deferred):
+            return self._resolve(key, value)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = super(Configuration, self).get(key, default)
+        if isinstance(value, Deferred):
+            return self._resolve(key, value)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        # NB: a Python-level `__iter__` disables the C fast path that `dict(config)` and
+        # `**config` use to copy (unresolved) values; they use `keys()` and `__getitem__` instead
+        return dict.__iter__(self)
+
+    def items(self):  # type: ignore[override]
+        self._resolve_all()
+        return dict.items(self)
+
+    def values(self):  # type: ignore[override]
+        self._resolve_all()
+        return dict.values(self)
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other: object) -> bool:
+        self._resolve_all()
+        if isinstance(other, Configuration):
+            other._resolve_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __delattr__(self, name: str) -> None:
+        self._check_mutable()
+        super(Configuration, self).__delattr__(name)
+        self._invalidate_path_index()
+
+    def __delitem__(self, key: Any) -> None:
+        self._check_mutable()
+        super(Configuration, self).__delitem__(key)
+        self._invalidate_path_index()
+
+    def __hash__(self) -> int:  # type: ignore[override]
+        if not self._frozen:
+            raise TypeError("unhashable type: 'Configuration' (use `freeze()` first)")
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(frozenset(dict.items(self))))
+        return self._hash  # type: ignore[return-value]
+
+    def __reduce__(self):
+        return (_rebuild_configuration, (self.__class__, dict(dict.items(self)), self._frozen))
+
+    def _wrap(self, value: Any) -> Any:
         if isinstance(value, list):
-            value = [
+            return [
                 self.__class__(x)
                 if isinstance(x, dict) else x for x in value
             ]
         elif isinstance(value, tuple):
-            value = tuple(
+            return tuple(
                 self.__class__(x)
                 if isinstance(x, dict) else x for x in value
             )
         else:
-            value = self.__class__(value) if isinstance(value, dict) else value
-        super(Configuration, self).__setattr__(name, value)
+            return self.__class__(value) if isinstance(value, dict) else value
+
+    def _assign(self, name: str, value: Any) -> None:
+        if isinstance(value, Deferred):
+            # store as an item only, so that attribute access falls through to `__getattr__`
+            self.__dict__.pop(name, None)
+        else:
+            super(Configuration, self).__setattr__(name, value)
         super(Configuration, self).__setitem__(name, value)
+        if isinstance(value, Configuration):
+            object.__setattr__(value, "_parent", ref(self))
+        self._invalidate_path_index()
+
+    def _resolve_all(self) -> None:
+        for key, value in list(dict.items(self)):
+            if isinstance(value, Deferred):
+                self._resolve(key, value)
+
+    def _resolve(self, name: Any, deferred: Deferred) -> Any:
+        value = self._wrap(deferred.resolve())
+        self._assign(name, value)
+        return value
+
+    def _invalidate_path_index(self) -> None:
+        config: Optional[Configuration] = self
+        while config is not None:
+            if config._path_index is not None:
+                object.__setattr__(config, "_path_index", None)
+            config = config._parent() if config._parent is not None else None
+
+    def _build_path_index(self) -> Dict[Any, Any]:
+        index: Dict[Any, Any] = {}
+        stack: List[Tuple[Tuple[Any, ...], Configuration]] = [((), self)]
+        while stack:
+            prefix, config = stack.pop()
+            for key, value in dict.items(config):
+                path = prefix + (key, )
+                index[path] = value
+                index[".".join(map(str, path))] = value
+                if isinstance(value, Configuration):
+                    stack.append((path, value))
+        object.__setattr__(self, "_path_index", index)
+        return index
+
+    def get_path(self, path: Union[str, Sequence[Any]], default: Any = None) -> Any:
+        """
+        Get a (possibly deeply nested) value by its key path.
+
+        The path may either be a dotted string (`"foo.bar.baz"`) or a sequence
+        of keys (`("foo", "bar", "baz")`); the former is ambiguous for keys that
+        contain dots.
+
+        Deferred values along the path are resolved.
+
+        """
+        index = self._path_index
+        if index is None:
+            index = self._build_path_index()
+        if not isinstance(path, (str, tuple)):
+            path = tuple(path)
+        value = index.get(path, _MISSING)
+        if value is _MISSING:
+            # the path may continue below a deferred value
+            keys = path.split(".") if isinstance(path, str) else path
+            for length in range(1, len(keys)):
+                prefix = ".".join(keys[:length]) if isinstance(path, str) else keys[:length]
+                if isinstance(index.get(prefix), Deferred):
+                    self.get_path(prefix)
+                    return self.get_path(path, default)
+            return default
+        if isinstance(value, Deferred):
+            # resolve via the parent (which replaces the deferred value)
+            *heads, tail = path.split(".") if isinstance(path, str) else path
+            parent = self
+            for key in heads:
+                parent = parent[key]
+            return parent[tail]
+        return value
+
+    def _check_mutable(self) -> None:
+        if self._frozen:
+            raise FrozenConfigurationError("Cannot modify a frozen configuration")
+
+    def is_frozen(self) -> bool:
+        return self._frozen
+
+    def freeze(self) -> "Configuration":
+        """
+        Make this configuration (and all nested values) immutable and hashable.
+
+        Nested lists are converted to tuples and sets to frozensets; deferred values
+        are resolved.
+
+        """
+        if self._frozen:
+            return self
+
+        for key, value in dict.items(self):
+            if isinstance(value, Deferred):
+                value = self._resolve(key, value)
+            frozen_value = _freeze_value(value)
+            if frozen_value is not value:
+                self._assign(key, frozen_value)
+
+        object.__setattr__(self, "_frozen", True)
+        return self
+
+    def thaw(self) -> "Configuration":
+        """
+        Return a mutable (deep) copy of this configuration.
+
+        Tuples are converted (back) to lists and frozensets to sets.
+
+        """
+        return self.__class__({
+            key: _thaw_value(value)
+            for key, value in dict.items(self)
+        })
 
     def merge(self, dct: Optional[Dict[Any, Any]] = None, **kwargs) -> None:
         """
         Recursively merge a dictionary or kwargs into the current dict.
 
         """
+        self._check_mutable()
         if dct is None:
             dct = {}
         if kwargs:
             dct.update(**kwargs)
 
-        for key, value in dct.items():
+        for key, value in dict.items(dct):
+            # NB: avoid resolving deferred values (which are replaced regardless)
+            current = super(Configuration, self).get(key)
             if all((
                 isinstance(value, dict),
-                isinstance(self.get(key), Configuration),
-                getattr(self.get(key), "__merge__", True),
+                isinstance(current, Configuration),
+                getattr(current, "__merge__", True),
             )):
                 # recursively merge
                 self[key].merge(value)
-            elif isinstance(value, list) and isinstance(self.get(key), list):
+            elif isinstance(value, list) and isinstance(current, list):
                 # append
-                self[key] += value
+                self[key] = current + value
             else:
                 # set the new value
                 self[key] = value
 
+    def clear(self) -> None:
+        self._check_mutable()
+        super(Configuration, self).clear()
+        self._invalidate_path_index()
+
+    def pop(self, *args, **kwargs) -> Any:
+        self._check_mutable()
+        self._invalidate_path_index()
+        return super(Configuration, self).pop(*args, **kwargs)
+
+    def popitem(self) -> Any:
+        self._check_mutable()
+        self._invalidate_path_index()
+        return super(Configuration, self).popitem()
+
+    def setdefault(self, *args, **kwargs) -> Any:
+        self._check_mutable()
+        self._invalidate_path_index()
+        return super(Configuration, self).setdefault(*args, **kwargs)
+
+    def update(self, *args, **kwargs) -> None:
+        self._check_mutable()
+        super(Configuration, self).update(*args, **kwargs)
+        self._invalidate_path_index()
+
     __setitem__ = __setattr__
 
 
+def _freeze_value(value: Any) -> Any:
+    if isinstance(value, Configuration):
+        return value.freeze()
+    if isinstance(value, dict):
+        # e.g. a dictionary nested within a list
+        return Configuration(value).freeze()
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze_value(item) for item in value)
+    return value
+
+
+def _thaw_value(value: Any) -> Any:
+    if isinstance(value, Configuration):
+        return value.thaw()
+    if isinstance(value, (list, tuple)):
+        return [_thaw_value(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return set(value)
+    return value
+
+
+def _rebuild_configuration(cls, dct: Dict[Any, Any], frozen: bool) -> Configuration:
+    config = cls(dct)
+    return config.freeze() if frozen else config
+
+
 class Requirement:
     """
     A value type for configuration defaults that represents *expected* config.
@@ -91,12 +408,14 @@ class Requirement:
         required=True,
         default_factory=None,
         nullable=False,
+        lazy=False,
         *args,
         **kwargs,
     ):
         """
         :param type: a type callable
         :param mock_value: a default value to use during testing (only)
+        :param lazy: defer computing, casting, and validating the value until first access
 
         """
         self.type = type
@@ -105,6 +424,7 @@ class Requirement:
         self.mock_value = mock_value
         self.required = required
         self.nullable = nullable or (default_value is None)
+        self.lazy = lazy
 
         if kwargs:
             warn(
@@ -170,6 +490,9 @@ class Requirement:
         Validate this requirement.
 
         """
+        if isinstance(value, Deferred):
+            value = value.resolve()
+
         if isinstance(value, Requirement):
             # if the RHS is still a Requirement object, it was not set
             if metadata.testing and self.mock_value is not UNSET:
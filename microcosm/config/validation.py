@@ -4,7 +4,7 @@ Validation for configuration.
 """
 from typing import Any, Dict, Tuple
 
-from microcosm.config.model import Configuration, Requirement
+from microcosm.config.model import Configuration, Deferred, Requirement
 from microcosm.metadata import Metadata
 
 
@@ -25,15 +25,22 @@ def typed(*args, **kwargs) -> Requirement:
     return Requirement(*args, **kwargs)
 
 
-def validate(defaults, metadata: Metadata, config: Configuration) -> None:
+def validate(defaults, metadata: Metadata, config: Configuration, strict: bool = False) -> None:
     """
     Validate configuration.
 
+    Lazy requirements (and deferred values) are validated on first access unless
+    validation is `strict`.
+
     """
     for path, _, default, parent, value in zip_dicts(defaults, config):
         if isinstance(default, Requirement):
-            # validate the current value and assign the output
-            parent[path[-1]] = default.validate(metadata, path, value)
+            if not strict and (default.lazy or isinstance(value, Deferred)):
+                # validate the current value on first access
+                parent[path[-1]] = Deferred(default.validate, metadata, path, value)
+            else:
+                # validate the current value and assign the output
+                parent[path[-1]] = default.validate(metadata, path, value)
 
 
 def zip_dicts(left: Dict[Any, Any], right: Dict[Any, Any], prefix: Tuple[str, ...] = ()):
@@ -48,9 +55,13 @@ def zip_dicts(left: Dict[Any, Any], right: Dict[Any, Any], prefix: Tuple[str, ..
     """
     for key, left_value in left.items():
         path = prefix + (key, )
-        right_value = right.get(key)
+        # NB: avoid resolving deferred values
+        right_value = dict.get(right, key)
 
         if isinstance(left_value, dict):
+            if isinstance(right_value, Deferred):
+                # nested defaults require the (deferred) value to be resolved
+                right_value = right[key]
             yield from zip_dicts(left_value, right_value or {}, path)
         else:
             yield path, left, left_value, right, right_value
@@ -5,4 +5,5 @@ Shared constants.
 
 
 DEFAULTS = "_defaults"
+DEPENDENCIES = "_dependencies"
 RESERVED = object()
@@ -4,7 +4,7 @@ Factory decorators
 """
 from typing import Callable, Optional
 
-from microcosm.constants import DEFAULTS
+from microcosm.constants import DEFAULTS, DEPENDENCIES
 from microcosm.registry import Registry, _registry
 
 
@@ -34,3 +34,17 @@ def defaults(**kwargs):
         setattr(func, DEFAULTS, kwargs)
         return func
     return decorator
+
+
+def depends_on(*keys: str):
+    """
+    Creates a decorator that declares the binding keys that a factory function depends on.
+
+    Declared dependencies allow graphs to be restricted to a subset of components
+    (see `create_object_graph(components=...)`).
+
+    """
+    def decorator(func):
+        setattr(func, DEPENDENCIES, keys)
+        return func
+    return decorator
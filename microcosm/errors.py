@@ -20,6 +20,14 @@ class CyclicGraphError(Exception):
     pass
 
 
+class FrozenConfigurationError(Exception):
+    """
+    Raised when attempting to modify a frozen configuration.
+
+    """
+    pass
+
+
 class LockedGraphError(Exception):
     """
     Raised when attempting to create a component in a locked object graph.
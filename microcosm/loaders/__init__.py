@@ -11,13 +11,18 @@ or from an external service.
 from typing import Any, Dict, Optional
 
 from microcosm.config.model import Configuration
+from microcosm.loaders.caching import load_with_cache  # noqa: F401
 from microcosm.loaders.compose import load_each, two_stage_loader  # noqa: F401
 from microcosm.loaders.environment import (  # noqa: F401
     load_from_environ,
     load_from_environ_as_json,
 )
 from microcosm.loaders.keys import expand_config  # noqa: F401
-from microcosm.loaders.settings import load_from_json_file  # noqa: F401
+from microcosm.loaders.settings import (  # noqa: F401
+    load_from_cached_file,
+    load_from_cached_json_file,
+    load_from_json_file,
+)
 from microcosm.metadata import Metadata
 from microcosm.typing import Loader
 
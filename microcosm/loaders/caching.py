@@ -0,0 +1,240 @@
+"""
+Caching of (slow) loaders.
+
+Wraps a loader so that its output is reused across calls (e.g. across several
+`create_object_graph` calls in the same process) and, optionally, persisted to disk
+so that a restart can fall back to the last good configuration if the underlying
+source is unavailable.
+
+"""
+from json import dumps, loads
+from os import (
+    fdopen,
+    replace,
+    stat,
+    unlink,
+)
+from os.path import abspath, split
+from tempfile import mkstemp
+from time import monotonic, time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+)
+from warnings import warn
+
+from microcosm.config.model import Configuration
+from microcosm.metadata import Metadata
+from microcosm.typing import Loader
+
+
+def version_from_mtime(path: str) -> Callable[[Metadata], Any]:
+    """
+    Create a version function that changes whenever a file is modified.
+
+    """
+    def _version_from_mtime(metadata: Metadata) -> Any:
+        result = stat(path)
+        return result.st_mtime_ns, result.st_size
+    return _version_from_mtime
+
+
+# the metadata used to key cached output
+METADATA_FLAGS = (
+    "name",
+    "testing",
+    "debug",
+)
+
+
+class CacheEntry:
+    """
+    The cached output of a loader (for one set of metadata).
+
+    """
+    def __init__(
+        self,
+        config: Configuration,
+        version: Any,
+        loaded_at: Optional[float],
+        saved_at: Optional[float] = None,
+    ) -> None:
+        self.config = config
+        self.version = version
+        # when the output was last loaded (or revalidated), per the loader's clock
+        self.loaded_at = loaded_at
+        # when the output was last loaded (or revalidated), as a timestamp
+        self.saved_at = time() if saved_at is None else saved_at
+
+
+class CachingLoader:
+    """
+    Loader that caches the output of another loader.
+
+    Output is cached separately for each service name (and testing/debug flags), both in
+    memory and on disk.
+
+    Cached output is considered fresh:
+
+     -  For `ttl` seconds after it was loaded (if a `ttl` is provided)
+     -  Forever (if neither a `ttl` nor a `version` function is provided)
+
+    Once cached output is no longer fresh, the `version` function (if any) is used to
+    check whether the source has changed (e.g. via an mtime, an ETag, or a version
+    number); the loader is only invoked if it has.
+
+    If the loader (or the version function) fails, the last good output is used
+    instead (with a warning that includes the error and the output's age), either from
+    memory or from the file at `path` (if any). As this output may contain secrets, the
+    file is only readable by its owner.
+
+    Only failures trigger the fallback: to fall back when the source is slow, wrap the
+    loader so that it raises, e.g. `load_each(loader, concurrent=True, timeout=...)`.
+
+    """
+    def __init__(
+        self,
+        loader: Loader,
+        ttl: Optional[float] = None,
+        version: Optional[Callable[[Metadata], Any]] = None,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.loader = loader
+        self.ttl = ttl
+        self.version = version
+        self.path = path
+        self.clock = clock
+
+        self.entries: Dict[str, CacheEntry] = {}
+
+    def key_for(self, metadata: Metadata) -> str:
+        return ":".join(str(getattr(metadata, flag)) for flag in METADATA_FLAGS)
+
+    def __call__(self, metadata: Metadata) -> Configuration:
+        key = self.key_for(metadata)
+        entry = self.entries.get(key)
+        if entry is not None and self.is_fresh(entry):
+            return Configuration(entry.config)
+
+        try:
+            version = self.version(metadata) if self.version is not None else None
+            if entry is not None and self.version is not None and version == entry.version:
+                # source has not changed; extend the lifetime of the cached output
+                entry.loaded_at = self.clock()
+                entry.saved_at = time()
+                return Configuration(entry.config)
+
+            config = Configuration(self.loader(metadata))
+        except Exception as error:
+            fallback = (entry.config, entry.saved_at) if entry is not None else self.read_entry(key)
+            if fallback is None:
+                raise
+            fallback_config, saved_at = fallback
+            warn(
+                f"Unable to load configuration for {key} ({error!r}); "
+                f"using cached configuration from {time() - saved_at:.0f}s ago"
+            )
+            return Configuration(fallback_config)
+
+        self.entries[key] = CacheEntry(config, version, self.clock())
+        self.write(key, config)
+        return Configuration(config)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        if entry.loaded_at is None:
+            return False
+        if self.ttl is not None:
+            return self.clock() - entry.loaded_at < self.ttl
+        return self.version is None
+
+    def invalidate(self) -> None:
+        """
+        Force the next call to revalidate the cached output.
+
+        """
+        for entry in self.entries.values():
+            entry.loaded_at = None
+
+    def read(self, key: str) -> Optional[Configuration]:
+        """
+        Read previously persisted output (if any).
+
+        """
+        entry = self.read_entry(key)
+        return entry[0] if entry is not None else None
+
+    def read_entry(self, key: str) -> Optional[Tuple[Configuration, float]]:
+        """
+        Read previously persisted output (if any) and when it was saved.
+
+        """
+        value = self._read_all().get(key)
+        if not isinstance(value, dict):
+            return None
+        config, saved_at = value.get("config"), value.get("saved_at")
+        if not isinstance(config, dict) or not isinstance(saved_at, (int, float)):
+            return None
+        return Configuration(config), saved_at
+
+    def write(self, key: str, config: Configuration) -> None:
+        """
+        Persist output (atomically), so that it survives restarts.
+
+        """
+        if self.path is None:
+            return
+
+        data = self._read_all()
+        data[key] = dict(config=config, saved_at=time())
+
+        directory, filename = split(abspath(self.path))
+        try:
+            # NB: temporary files are unique and only readable by their owner
+            fd, temporary_path = mkstemp(dir=directory, prefix=f".{filename}.", suffix=".tmp")
+        except OSError as error:
+            warn(f"Unable to persist cached configuration to {self.path}: {error}")
+            return
+
+        try:
+            with fdopen(fd, "w") as file_:
+                file_.write(dumps(data))
+            replace(temporary_path, self.path)
+        except (OSError, TypeError, ValueError) as error:
+            warn(f"Unable to persist cached configuration to {self.path}: {error}")
+            try:
+                unlink(temporary_path)
+            except OSError:
+                pass
+
+    def _read_all(self) -> Dict[str, Any]:
+        if self.path is None:
+            return {}
+
+        try:
+            with open(self.path, "r") as file_:
+                data = loads(file_.read())
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+def load_with_cache(
+    loader: Loader,
+    ttl: Optional[float] = None,
+    version: Optional[Callable[[Metadata], Any]] = None,
+    path: Optional[str] = None,
+) -> CachingLoader:
+    """
+    Cache the output of a loader.
+
+    :param loader: the loader to cache
+    :param ttl: the time (in seconds) for which output is used without revalidation
+    :param version: a function that returns the current version of the loader's source
+    :param path: a file used to persist the last good output
+
+    """
+    return CachingLoader(loader, ttl=ttl, version=version, path=path)
@@ -2,13 +2,19 @@
 Functional composition of loaders.
 
 """
+from asyncio import iscoroutine, run
 from collections import defaultdict
+from queue import SimpleQueue
+from threading import Event, Thread
+from time import monotonic
 from typing import (
     Any,
     Callable,
     Dict,
     Iterable,
+    List,
     Optional,
+    Tuple,
 )
 
 from microcosm.config.model import Configuration
@@ -54,11 +60,23 @@ def two_stage_loader(
     return loader
 
 
-def load_each(*loaders: Loader) -> Callable[[Metadata], Configuration]:
+def load_each(
+    *loaders: Loader,
+    concurrent: bool = False,
+    timeout: Optional[float] = None,
+    max_workers: Optional[int] = None,
+) -> Callable[[Metadata], Configuration]:
     """
     Loader factory that combines a series of loaders.
 
+    :param concurrent: run the loaders concurrently (see `ConcurrentLoader`)
+    :param timeout: when concurrent, the time (in seconds) allowed for each loader (from when it starts)
+    :param max_workers: when concurrent, the maximum number of loaders run at once
+
     """
+    if concurrent:
+        return ConcurrentLoader(*loaders, timeout=timeout, max_workers=max_workers)
+
     def _load_each(metadata):
         return merge(
             loader(metadata)
@@ -67,8 +85,138 @@ def load_each(*loaders: Loader) -> Callable[[Metadata], Configuration]:
     return _load_each
 
 
+def get_loader_name(loader: Callable[..., Any]) -> str:
+    return getattr(loader, "__name__", loader.__class__.__name__)
+
+
+class _LoaderTask:
+    """
+    A loader run by a `ConcurrentLoader` worker.
+
+    """
+    def __init__(self, loader: Callable[[Metadata], Any]) -> None:
+        self.loader = loader
+        self.started = Event()
+        self.done = Event()
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def run(self, metadata: Metadata) -> None:
+        self.started_at = monotonic()
+        self.started.set()
+        try:
+            config = self.loader(metadata)
+            if iscoroutine(config):
+                config = run(config)
+            self.result = config
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.duration = monotonic() - self.started_at
+            self.done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for this loader to complete, for at most `timeout` seconds from when it started.
+
+        """
+        self.started.wait()
+        if timeout is None:
+            return self.done.wait()
+        return self.done.wait(self.started_at + timeout - monotonic())  # type: ignore[operator]
+
+
+class ConcurrentLoader:
+    """
+    Loader that runs independent loaders concurrently on worker threads.
+
+    Loaders may be plain functions or coroutine functions; the latter are run in their
+    own event loop on a worker thread. Outputs are always merged in loader order, so the
+    result is the same as for sequential loading.
+
+    Each loader's timeout is measured from when that loader starts (time spent waiting
+    for a worker does not count). Python threads cannot be interrupted, so a timeout only
+    unblocks the caller: a loader that has timed out keeps running on its (daemon) worker
+    thread, which does not prevent the process from exiting. Loaders that have not started
+    when loading fails are never started.
+
+    The time taken by each loader (in seconds) is available via `timings` after loading.
+
+    """
+    def __init__(
+        self,
+        *loaders: Callable[[Metadata], Any],
+        timeout: Optional[float] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.loaders = loaders
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.timings: List[Tuple[str, float]] = []
+
+    def __call__(self, metadata: Metadata) -> Configuration:
+        """
+        Load configuration concurrently.
+
+        :raises TimeoutError: if a loader does not complete within `timeout` seconds
+            of starting
+
+        """
+        tasks = [_LoaderTask(loader) for loader in self.loaders]
+        pending: SimpleQueue[Optional[_LoaderTask]] = SimpleQueue()
+        for task in tasks:
+            pending.put(task)
+
+        def work() -> None:
+            while True:
+                task = pending.get()
+                if task is None:
+                    return
+                task.run(metadata)
+
+        num_workers = min(self.max_workers or len(tasks), len(tasks))
+        for index in range(num_workers):
+            pending.put(None)
+            Thread(target=work, name=f"microcosm-loader-{index}", daemon=True).start()
+
+        try:
+            configs = []
+            for task in tasks:
+                # NB: every earlier loader has completed, so this loader will start
+                if not task.wait(self.timeout):
+                    raise TimeoutError(
+                        f"Loader {get_loader_name(task.loader)} did not complete within {self.timeout} seconds",
+                    )
+                if task.error is not None:
+                    raise task.error
+                configs.append(task.result)
+        finally:
+            # do not start any more loaders
+            while not pending.empty():
+                pending.get_nowait()
+            for index in range(num_workers):
+                pending.put(None)
+
+            self.timings = [
+                (get_loader_name(task.loader), task.duration)
+                for task in tasks
+                if task.duration is not None
+            ]
+
+        return merge(configs)
+
+    def __str__(self) -> str:
+        return "\n".join(
+            "{:10.8f} - {}".format(duration, name)
+            for name, duration in self.timings
+        )
+
+
 def dfs(dct, func, prefix=()):
-    for key, value in dct.items():
+    # NB: avoid resolving deferred values
+    for key, value in dict.items(dct):
         path = prefix + (key, )
         if isinstance(value, dict):
             dfs(value, func, path)
@@ -87,16 +235,34 @@ def traverse(dct, path):
         return value
 
 
+def merged_value(config: Configuration, path: Tuple[str, ...]) -> Any:
+    """
+    Get the value that merging into a configuration would merge with at a path (if any).
+
+    """
+    value: Any = config
+    for index, key in enumerate(path):
+        if not isinstance(value, dict) or (index and not getattr(value, "__merge__", True)):
+            return None
+        value = dict.get(value, key)
+    return value
+
+
 class PartitioningLoader:
     """
     Loader that composes other loaders and can enumerate which config value
     came from each partition.
 
+    Each (post-merge) leaf value is attributed to the last partition that wrote it, except
+    for lists that several partitions appended to: each of these partitions is attributed
+    (only) the elements it contributed and the list as a whole has no provenance.
+
     """
     def __init__(self, **loaders):
         # NB: as long as we're using Python >= 3.6, the loader dict order is preserved
         self.loaders: Dict[str, Loader] = loaders
         self.partitions: Dict[str, Dict[str, str]] = defaultdict(dict)
+        self.provenance: Dict[Tuple[str, ...], str] = dict()
 
     def __getattr__(self, partition) -> Optional[Dict[str, str]]:
         """
@@ -122,20 +288,40 @@ class PartitioningLoader:
         came from.
 
         """
-        configs = {
-            key: loader(metadata)
-            for key, loader in self.loaders.items()
-        }
-        config = merge(configs.values())
+        config = Configuration()
+        # the partitions (and values) that wrote each leaf path since it was last replaced
+        writers: Dict[Tuple[str, ...], List[Tuple[str, Any]]] = dict()
+
+        for partition, loader in self.loaders.items():
+            partition_config = loader(metadata)
+
+            def record(path, value, partition=partition):
+                if isinstance(value, list) and isinstance(merged_value(config, path), list):
+                    # lists are appended to (rather than replaced) when merged
+                    writers[path].append((partition, value))
+                else:
+                    writers[path] = [(partition, value)]
+
+            # NB: record writes before merging to tell appends from replacements
+            dfs(partition_config, record)
+            config.merge(partition_config)
+
+        provenance: Dict[Tuple[str, ...], str] = dict()
 
         def visit(path, value):
-            for partition, config in configs.items():
-                # NB: if multiple loaders return the same path/value, we'll duplicate here.
-                # The right answer is extend the merge function to perform this tracking.
-                if value == traverse(config, path):
-                    self.merge_partition(partition, path, value)
+            contributions = writers.get(path)
+            if contributions is None:
+                return
+            if len(contributions) > 1:
+                for partition, contribution in contributions:
+                    self.merge_partition(partition, path, contribution)
+                return
+            partition, _ = contributions[0]
+            provenance[path] = partition
+            self.merge_partition(partition, path, value)
 
         dfs(config, visit)
+        self.provenance = provenance
         return config
 
 
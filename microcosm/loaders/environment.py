@@ -6,10 +6,57 @@ Uses a naming convention to map environment variables to nested configuration.
 """
 from json import loads
 from os import environ
+from typing import Any, Dict, Mapping
 
 from microcosm.loaders.keys import expand_config
 
 
+SEPARATOR = "__"
+
+
+class EnvironmentSnapshot:
+    """
+    A copy of the environment, indexed by variable name prefix.
+
+    Variable names are split once (when the snapshot is taken) so that loading
+    configuration for a service only considers the variables for that service.
+
+    """
+    def __init__(self, raw: Mapping[Any, Any], variables: Mapping[str, str]) -> None:
+        self.raw = dict(raw)
+        self.prefixes: Dict[str, Dict[str, str]] = dict()
+        for key, value in variables.items():
+            prefix, separator, _ = key.partition(SEPARATOR)
+            if separator:
+                self.prefixes.setdefault(prefix, dict())[key] = value
+
+    def is_current(self, raw: Mapping[Any, Any]) -> bool:
+        return self.raw == raw
+
+    def for_prefix(self, prefix: str) -> Dict[str, str]:
+        return self.prefixes.get(prefix, {})
+
+
+_snapshot = EnvironmentSnapshot({}, {})
+
+
+def get_environ_snapshot() -> EnvironmentSnapshot:
+    """
+    Get a snapshot of the current environment.
+
+    The snapshot is retaken whenever `os.environ` changes.
+
+    """
+    global _snapshot
+
+    # NB: comparing the underlying (encoded) data avoids decoding every variable
+    raw = getattr(environ, "_data", environ)
+    snapshot = _snapshot
+    if not snapshot.is_current(raw):
+        snapshot = _snapshot = EnvironmentSnapshot(raw, environ)
+    return snapshot
+
+
 def _load_from_environ(metadata, value_func=None):
     """
     Load configuration from environment variables.
@@ -35,11 +82,10 @@ def _load_from_environ(metadata, value_func=None):
     prefix = metadata.name.upper().replace("-", "_")
 
     return expand_config(
-        dict(environ),
-        separator="__",
+        get_environ_snapshot().for_prefix(prefix),
+        separator=SEPARATOR,
         skip_to=1,
-        key_parts_filter=lambda key_parts: len(key_parts) > 1 and key_parts[0] == prefix,
-        value_func=lambda value: value_func(value) if value_func else value,
+        **(dict(value_func=value_func) if value_func else dict()),
     )
 
 
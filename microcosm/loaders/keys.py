@@ -7,20 +7,36 @@ from typing import (
     Callable,
     Dict,
     List,
+    Union,
 )
 
 
+def _lower_key(key: str) -> str:
+    return key.lower()
+
+
+def _include_all(key_parts: List[str]) -> bool:
+    return True
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
 def expand_config(
     dct: Dict[Any, Any],
-    separator: str = '.',
+    separator: Union[str, Callable[[str], str]] = '.',
     skip_to: int = 0,
-    key_func: Callable[[str], str] = lambda key: key.lower(),
-    key_parts_filter: Callable[[List[str]], bool] = lambda key_parts: True,
-    value_func: Callable[[str], str] = lambda value: value
+    key_func: Callable[[str], str] = _lower_key,
+    key_parts_filter: Callable[[List[str]], bool] = _include_all,
+    value_func: Callable[[str], str] = _identity,
 ):
     """
     Expand a dictionary recursively by splitting keys along the separator.
 
+    Intermediate dictionaries are looked up by their (unsplit) key prefix, so that
+    sibling keys share a single lookup; the default functions are inlined.
+
     :param dct: a non-recursive dictionary
     :param separator: a separator character for splitting dictionary keys
     :param skip_to: index to start splitting keys on; can be used to skip over a key prefix
@@ -30,16 +46,37 @@ def expand_config(
 
     """
     config: Dict[str, Any] = {}
+    # intermediate dictionaries by the (unsplit) key prefix that leads to them
+    nodes: Dict[Any, Any] = {None: config}
+
+    split_by_key = callable(separator)
+    lower_keys = key_func is _lower_key
+    filter_keys = key_parts_filter is not _include_all
+    map_values = value_func is not _identity
 
     for key, value in dct.items():
         key_separator = separator(key) if callable(separator) else separator
-        key_parts = key.split(key_separator)
-        if not key_parts_filter(key_parts):
+        if filter_keys and not key_parts_filter(key.split(key_separator)):
             continue
-        key_config = config
-        # skip prefix
-        for key_part in key_parts[skip_to:-1]:
-            key_config = key_config.setdefault(key_func(key_part), dict())
-        key_config[key_func(key_parts[-1])] = value_func(value)
+
+        head, found, leaf = key.rpartition(key_separator)
+        if not found:
+            node_key = None
+        else:
+            node_key = (key_separator, head) if split_by_key else head
+        try:
+            key_config = nodes[node_key]
+        except KeyError:
+            key_config = config
+            # skip prefix
+            for key_part in head.split(key_separator)[skip_to:]:
+                key_config = key_config.setdefault(key_part.lower() if lower_keys else key_func(key_part), dict())
+            nodes[node_key] = key_config
+
+        leaf = leaf.lower() if lower_keys else key_func(leaf)
+        if leaf in key_config and isinstance(key_config[leaf], dict):
+            # an intermediate dictionary is being replaced; forget it (and its children)
+            nodes = {None: config}
+        key_config[leaf] = value_func(value) if map_values else value
 
     return config
@@ -4,9 +4,31 @@ Load configuration from a settings file.
 The settings file is identified using a `FOO_SETTINGS` environment variable
 and consumed using a customizable load function (default: json).
 
+Large settings files may be loaded via a compiled (`marshal`) cache that is kept
+alongside the file and reused for as long as the file is unchanged.
+
 """
+from hashlib import sha256
 from json import loads
-from os import environ
+from marshal import dumps as marshal_dumps, loads as marshal_loads
+from mmap import ACCESS_READ, mmap
+from os import (
+    environ,
+    fchmod,
+    fdopen,
+    fstat,
+    replace,
+    stat,
+    unlink,
+)
+from os.path import (
+    abspath,
+    basename,
+    dirname,
+    join,
+)
+from stat import S_IMODE
+from tempfile import mkstemp
 from typing import (
     Any,
     Callable,
@@ -20,6 +42,10 @@ from inflection import underscore
 from microcosm.metadata import Metadata
 
 
+# NB: increment when the cache file layout changes
+CACHE_FORMAT_VERSION = 1
+
+
 def get_config_filename(metadata: Metadata) -> Optional[str]:
     """
     Derive a configuration file name from the FOO_SETTINGS
@@ -56,3 +82,146 @@ def load_from_json_file(metadata: Metadata) -> Dict[Any, Any]:
 
     """
     return _load_from_file(metadata, loads)
+
+
+def get_cache_name(load_func: Callable[..., Any]) -> str:
+    """
+    Derive a cache name from a (named) load function.
+
+    :raises ValueError: if the function is a lambda or a nested function, which cannot be told
+        apart from other such functions in the same module
+
+    """
+    module = getattr(load_func, "__module__", None)
+    qualname = getattr(load_func, "__qualname__", None)
+    if module is None or qualname is None or "<" in qualname:
+        raise ValueError(f"A cache name is required for load function: {load_func!r}")
+    return "{}.{}".format(module, qualname)
+
+
+def get_cache_filename(config_filename: str, cache_dir: Optional[str] = None, cache_name: str = "json") -> str:
+    """
+    Derive the compiled cache file name for a configuration file (and format).
+
+    By default, the cache lives next to the configuration file.
+
+    """
+    if cache_dir is None:
+        return "{}.{}.cache".format(config_filename, cache_name)
+
+    digest = sha256(abspath(config_filename).encode("utf-8")).hexdigest()[:16]
+    return join(cache_dir, "{}.{}.{}.cache".format(basename(config_filename), digest, cache_name))
+
+
+def read_file(filename: str) -> bytes:
+    """
+    Read a file via a memory map.
+
+    """
+    with open(filename, "rb") as file_:
+        if fstat(file_.fileno()).st_size == 0:
+            # NB: empty files cannot be memory mapped
+            return b""
+        with mmap(file_.fileno(), 0, access=ACCESS_READ) as mapped:
+            return mapped[:]
+
+
+def _load_from_cached_file(
+    metadata: Metadata,
+    load_func: Callable[[str], Mapping[str, Any]],
+    cache_dir: Optional[str] = None,
+    cache_name: str = "json",
+) -> Dict[Any, Any]:
+    """
+    Load configuration from a file, using a compiled cache when possible.
+
+    The cache is keyed by the file's path, size, and modification time (and by
+    the cache name, which identifies the load function); any failure to read or write the cache falls back to
+    loading the file itself.
+
+    Settings files often contain secrets, so the cache is only readable by its owner (and is never
+    more readable than the file itself).
+
+    """
+    config_filename = get_config_filename(metadata)
+    if config_filename is None:
+        return dict()
+
+    result = stat(config_filename)
+    key = (
+        CACHE_FORMAT_VERSION,
+        abspath(config_filename),
+        result.st_size,
+        result.st_mtime_ns,
+        cache_name,
+    )
+    cache_filename = get_cache_filename(config_filename, cache_dir, cache_name)
+
+    try:
+        # NB: unmarshalling from bytes is much faster than from a file object
+        with open(cache_filename, "rb") as file_:
+            cached_key, data = marshal_loads(file_.read())
+        if cached_key == key:
+            return data
+    except (OSError, EOFError, TypeError, ValueError):
+        pass
+
+    data = dict(load_func(read_file(config_filename).decode("utf-8")))
+
+    try:
+        # NB: temporary files are unique and only readable by their owner
+        fd, temporary_filename = mkstemp(
+            dir=dirname(abspath(cache_filename)),
+            prefix=".{}.".format(basename(cache_filename)),
+            suffix=".tmp",
+        )
+    except OSError:
+        # cache directory is not writable
+        return data
+
+    try:
+        fchmod(fd, S_IMODE(result.st_mode) & 0o600)
+        with fdopen(fd, "wb") as file_:
+            file_.write(marshal_dumps((key, data)))
+        replace(temporary_filename, cache_filename)
+    except (OSError, ValueError):
+        # data is not marshallable (e.g. custom types)
+        try:
+            unlink(temporary_filename)
+        except OSError:
+            pass
+
+    return data
+
+
+def load_from_cached_file(
+    load_func: Callable[[str], Mapping[str, Any]],
+    cache_dir: Optional[str] = None,
+    cache_name: Optional[str] = None,
+) -> Callable[[Metadata], Dict[Any, Any]]:
+    """
+    Create a settings file loader that uses a compiled cache.
+
+    Supports any load function that returns plain data (e.g. `tomllib.loads`).
+
+    :param load_func: a function that parses the file's (decoded) contents
+    :param cache_dir: the directory for cache files; defaults to the settings file's directory
+    :param cache_name: a name that identifies the load function (and its output format) in the cache;
+        required unless the load function is a named, module-level function
+    :raises ValueError: if no cache name is given for a lambda or nested load function
+
+    """
+    if cache_name is None:
+        cache_name = get_cache_name(load_func)
+
+    def _load_from_cached_settings_file(metadata: Metadata) -> Dict[Any, Any]:
+        return _load_from_cached_file(metadata, load_func, cache_dir, cache_name)
+    return _load_from_cached_settings_file
+
+
+def load_from_cached_json_file(metadata: Metadata) -> Dict[Any, Any]:
+    """
+    Load configuration from a JSON file, using a compiled cache.
+
+    """
+    return _load_from_cached_file(metadata, loads)
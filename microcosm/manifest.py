@@ -0,0 +1,120 @@
+"""
+Boot manifests.
+
+Services tend to resolve the same components (from the same modules) on every start.
+A boot manifest records these after the graph is locked so that the next start can
+import the same modules in a background thread, overlapping import latency with
+configuration loading (instead of paying for it within each factory call).
+
+"""
+from importlib import import_module
+from json import dumps, loads
+from os import getpid, replace
+from sys import modules as imported_modules
+from threading import Thread
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+from warnings import warn
+
+
+class BootManifest:
+    """
+    The components resolved during a previous boot.
+
+    """
+    def __init__(
+        self,
+        keys: Iterable[str] = (),
+        modules: Iterable[str] = (),
+        timings: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        :param keys: the resolved binding keys, in resolution order
+        :param modules: the modules that define the factories for these keys
+        :param timings: the time (in seconds) taken to resolve each key
+
+        """
+        self.keys: List[str] = list(keys)
+        self.modules: List[str] = list(modules)
+        self.timings: Dict[str, float] = timings or dict()
+
+    @classmethod
+    def from_graph(cls, graph: Any) -> "BootManifest":
+        """
+        Create a manifest from the components resolved by a graph.
+
+        Timings are only available if the graph's profiler records them
+        (e.g. a `TimingProfiler`).
+
+        """
+        keys = list(graph.get_dependencies())
+        modules: Dict[str, None] = dict()
+        for key in keys:
+            module = getattr(graph.factory_for(key), "__module__", None)
+            if module is not None:
+                modules[module] = None
+
+        return cls(
+            keys=keys,
+            modules=modules,
+            timings=dict(getattr(graph._profiler, "times", {})),
+        )
+
+    @classmethod
+    def read(cls, path: str) -> Optional["BootManifest"]:
+        """
+        Read a manifest, if one exists.
+
+        """
+        try:
+            with open(path, "r") as file_:
+                data = loads(file_.read())
+            return cls(
+                keys=data["keys"],
+                modules=data["modules"],
+                timings=data["timings"],
+            )
+        except (KeyError, OSError, TypeError, ValueError):
+            return None
+
+    def write(self, path: str) -> None:
+        """
+        Write this manifest (atomically).
+
+        """
+        temporary_path = "{}.{}.tmp".format(path, getpid())
+        try:
+            with open(temporary_path, "w") as file_:
+                file_.write(dumps(dict(
+                    keys=self.keys,
+                    modules=self.modules,
+                    timings=self.timings,
+                ), indent=2))
+            replace(temporary_path, path)
+        except OSError as error:
+            warn(f"Unable to write boot manifest to {path}: {error}")
+
+    def prefetch(self) -> Thread:
+        """
+        Import this manifest's modules in a background thread.
+
+        Import failures are ignored; they will surface (as usual) on resolution.
+
+        """
+        def import_modules() -> None:
+            for module in self.modules:
+                if module in imported_modules:
+                    continue
+                try:
+                    import_module(module)
+                except Exception:
+                    pass
+
+        thread = Thread(target=import_modules, name="microcosm-prefetch", daemon=True)
+        thread.start()
+        return thread
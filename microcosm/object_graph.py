@@ -8,33 +8,85 @@ to the graph lazily (or via `graph.use()`) and are cached for reuse.
 """
 from __future__ import annotations
 
-from contextlib import contextmanager
+from threading import (
+    Event,
+    Lock,
+    get_ident,
+    local,
+)
+from time import monotonic
 from typing import (
     Any,
     Callable,
+    Dict,
     Iterable,
     List,
+    Mapping,
     Optional,
+    Set,
     Tuple,
     Type,
 )
 
 from microcosm.caching import Cache, create_cache
 from microcosm.config.api import configure
+from microcosm.config.cache import ConfigurationCache
 from microcosm.config.model import Configuration
-from microcosm.constants import RESERVED
+from microcosm.config.validation import validate
 from microcosm.errors import CyclicGraphError, LockedGraphError
 from microcosm.hooks import invoke_resolve_hook
 from microcosm.loaders import load_from_environ
+from microcosm.manifest import BootManifest
 from microcosm.metadata import Metadata
-from microcosm.profile import NoopProfiler
-from microcosm.registry import Registry, _registry
+from microcosm.profile import NoopProfiler, ResolutionProfiler
+from microcosm.registry import Registry, _registry, get_defaults
 from microcosm.typing import Component
 
 
 Factory = Callable[['ObjectGraph'], Component]
 
 
+class _Reservation:
+    """
+    A component that is being created (by its owner thread).
+
+    Reservations are stored in the component cache (in place of the component) so that
+    graphs that share a cache (e.g. a `ProcessCache`) also share reservations.
+
+    """
+    __slots__ = ("owner", "done")
+
+    def __init__(self) -> None:
+        self.owner = get_ident()
+        self.done = Event()
+
+
+# guards reserving components (in any cache)
+_reservation_lock = Lock()
+# the reservation that each (blocked) thread is waiting for
+_waiting: Dict[int, _Reservation] = {}
+# how often (in seconds) a blocked thread checks for cycles
+WAIT_INTERVAL = 0.05
+
+
+def _waits_for(reservation: _Reservation, ident: int) -> bool:
+    """
+    Check whether a reservation is (transitively) waiting for a thread.
+
+    """
+    owner = reservation.owner
+    seen = set()
+    while owner not in seen:
+        if owner == ident:
+            return True
+        seen.add(owner)
+        waiting = _waiting.get(owner)
+        if waiting is None:
+            return False
+        owner = waiting.owner
+    return False
+
+
 class ObjectGraph:
     """
     An object graph contains all of the instantiated components for a microservice.
@@ -42,8 +94,24 @@ class ObjectGraph:
     Because components can reference each other a-cyclically, this collection of
     components forms a directed acyclic graph.
 
+    Each component is created by one thread; threads that access a component while another
+    thread is creating it wait for (only) that component. Factories may themselves resolve
+    components from other threads.
+
     """
-    def __init__(self, metadata: Metadata, config, registry, profiler, cache, loader) -> None:
+    def __init__(
+        self,
+        metadata: Metadata,
+        config,
+        registry,
+        profiler,
+        cache,
+        loader,
+        lazy_validation: bool = False,
+        strict_config: bool = False,
+        boot_manifest: Optional[str] = None,
+        resolution_timeout: Optional[float] = None,
+    ) -> None:
         self.metadata = metadata
         self.config = config
         self._locked = False
@@ -51,6 +119,18 @@ class ObjectGraph:
         self._profiler = profiler
         self._cache = cache
         self.loader = loader
+        # keys whose configuration has been validated (or `None` if all configuration was validated)
+        self._validated_keys: Optional[Set[str]] = set() if lazy_validation else None
+        self._strict_config = strict_config
+        # keys currently being resolved by each thread (innermost last) and the keys each one accessed
+        self._local = local()
+        self._dependencies: Dict[str, Dict[str, None]] = {}
+        # scoped views of this graph by factory key and scope (see `ScopedFactory`)
+        self._scoped_graphs: Dict[Tuple[str, Any], Any] = {}
+        # path to which a boot manifest is written on `lock()` (if any)
+        self._boot_manifest = boot_manifest
+        # how long (in seconds) to wait for a component that another thread is creating
+        self._resolution_timeout = resolution_timeout
 
     def use(self, *keys: str) -> List[Component]:
         """
@@ -75,8 +155,12 @@ class ObjectGraph:
         """
         Lock the graph so that new components cannot be created.
 
+        Writes the graph's boot manifest (if any).
+
         """
         self._locked = True
+        if self._boot_manifest is not None:
+            BootManifest.from_graph(self).write(self._boot_manifest)
         return self
 
     def unlock(self) -> ObjectGraph:
@@ -103,16 +187,18 @@ class ObjectGraph:
         :raises LockedGraphError: if the graph is locked
 
         """
+        resolving = getattr(self._local, "resolving", None)
+        if resolving:
+            self._dependencies[resolving[-1]][key] = None
+
         try:
             component = self._cache[key]
-            if component is RESERVED:
-                raise CyclicGraphError(key)
-            return component
         except KeyError:
             pass
+        else:
+            if type(component) is not _Reservation:
+                return component
 
-        if self._locked:
-            raise LockedGraphError(key)
         return self._resolve_key(key)
 
     def __setattr__(self, key: str, value: Component) -> None:
@@ -120,19 +206,81 @@ class ObjectGraph:
             raise Exception("Cannot setattr on ObjectGraph for key: {}".format(key))
         super(ObjectGraph, self).__setattr__(key, value)
 
-    @contextmanager
-    def _reserve(self, key: str) -> Any:
+    @property
+    def _resolving(self) -> List[str]:
+        try:
+            return self._local.resolving
+        except AttributeError:
+            resolving = self._local.resolving = []
+            return resolving
+
+    def _create_once(self, key: str, create: Callable[[], Component]) -> Component:
         """
-        Reserve a component's binding temporarily.
+        Create and assign a component, unless another thread does so first.
+
+        The key is reserved while the component is created (which protects against cycles);
+        threads that access a reserved key wait for its component (only).
 
-        Protects against cycles.
+        A thread does not wait for a reservation whose owner is (transitively) waiting for it.
+        Cycles that cross threads through other means (e.g. a factory that waits for an executor)
+        cannot be detected, so waits are bounded by the graph's resolution timeout (if any).
+
+        :raises CyclicGraphError: if creating the component requires itself (or times out)
 
         """
-        self.assign(key, RESERVED)
+        cache = self._cache
+        try:
+            component = cache[key]
+        except KeyError:
+            pass
+        else:
+            if type(component) is not _Reservation:
+                return component
+
+        while True:
+            with _reservation_lock:
+                try:
+                    component = cache[key]
+                except KeyError:
+                    reservation = cache[key] = _Reservation()
+                    break
+                if type(component) is not _Reservation:
+                    return component
+                reservation = component
+
+            # wait for the other thread; if it fails, try again
+            self._wait_for(key, reservation)
+
         try:
-            yield
+            component = create()
+        except BaseException:
+            with _reservation_lock:
+                del cache[key]
+            reservation.done.set()
+            raise
+
+        with _reservation_lock:
+            cache[key] = component
+        reservation.done.set()
+        return component
+
+    def _wait_for(self, key: str, reservation: _Reservation) -> None:
+        ident = get_ident()
+        if _waits_for(reservation, ident):
+            raise CyclicGraphError(key)
+
+        timeout = self._resolution_timeout
+        deadline = None if timeout is None else monotonic() + timeout
+        _waiting[ident] = reservation
+        try:
+            while not reservation.done.wait(WAIT_INTERVAL):
+                if _waits_for(reservation, ident):
+                    raise CyclicGraphError(key)
+                if deadline is not None and monotonic() > deadline:
+                    # assume that the owner is (indirectly) waiting for this thread
+                    raise CyclicGraphError(key)
         finally:
-            del self._cache[key]
+            del _waiting[ident]
 
     def _resolve_key(self, key: str) -> Component:
         """
@@ -142,13 +290,67 @@ class ObjectGraph:
         :raises CyclicGraphError: if the factory function requires a cycle
         :raises LockedGraphError: if the graph is locked
         """
-        with self._reserve(key):
-            factory = self.factory_for(key)
+        return self._create_once(key, lambda: self._create(key))
+
+    def _create(self, key: str) -> Component:
+        if self._locked:
+            raise LockedGraphError(key)
+
+        factory = self.factory_for(key)
+        self._dependencies[key] = {}
+        resolving = self._resolving
+        resolving.append(key)
+        try:
             with self._profiler(key):
+                if self._validated_keys is not None and key not in self._validated_keys:
+                    self._validate_key(key, factory)
                 component = factory(self)
-            invoke_resolve_hook(component)
+        finally:
+            resolving.pop()
+        invoke_resolve_hook(component)
+        return component
+
+    def get_dependencies(self) -> Dict[str, List[str]]:
+        """
+        Return the keys accessed by the factory of each resolved component.
+
+        The result can be saved and used as a dependency manifest for later graphs
+        (see `create_object_graph(components=...)`).
+
+        """
+        return {
+            key: list(dependencies)
+            for key, dependencies in self._dependencies.items()
+        }
+
+    def _validate_key(self, key: str, factory: Factory) -> None:
+        """
+        Validate the configuration for a single component.
 
-        return self.assign(key, component)
+        :raises ValidationError: if the configuration is not valid
+
+        """
+        validate({key: get_defaults(factory)}, self.metadata, self.config, strict=self._strict_config)
+        self._validated_keys.add(key)  # type: ignore[union-attr]
+
+    def validate_all(self) -> ObjectGraph:
+        """
+        Validate the configuration of all registered components.
+
+        Only needed when configuration is validated lazily (e.g. as a deployment check).
+
+        :raises ValidationError: if any configuration is not valid
+
+        """
+        if self._validated_keys is not None:
+            defaults = {
+                key: value
+                for key, value in self._registry.defaults.items()
+                if key not in self._validated_keys
+            }
+            validate(defaults, self.metadata, self.config, strict=self._strict_config)
+            self._validated_keys.update(defaults)
+        return self
 
     def items(self) -> Iterable[Tuple[str, Component]]:
         """
@@ -170,6 +372,14 @@ def create_object_graph(
     profiler: Any = None,
     cache: Optional[Type[Cache]] = None,
     description: str = "",
+    config_cache: Optional[ConfigurationCache] = None,
+    freeze_config: bool = False,
+    strict_config: bool = False,
+    lazy_validation: bool = False,
+    components: Optional[Iterable[str]] = None,
+    dependencies: Optional[Mapping[str, Iterable[str]]] = None,
+    boot_manifest: Optional[str] = None,
+    resolution_timeout: Optional[float] = 10.0,
 ) -> ObjectGraph:
     """
     Create a new object graph.
@@ -184,8 +394,24 @@ def create_object_graph(
     :param profiler:
     :param cache:
     :param description: an informative description of the graph object
+    :param config_cache: an optional cache used to memoize configuration (which, by default,
+        also freezes the configuration)
+    :param freeze_config: make the configuration immutable (and hashable) once validated
+    :param strict_config: validate lazy requirements and deferred values eagerly
+    :param lazy_validation: validate each component's configuration when it is first resolved
+        (see `ObjectGraph.validate_all()`); cannot be combined with `freeze_config`
+    :param components: restrict the graph to these components and their dependencies
+    :param dependencies: a dependency manifest (as from `ObjectGraph.get_dependencies()`)
+        used to compute the dependencies of `components`
+    :param boot_manifest: a path from which to prefetch the modules used by the previous boot
+        (if it exists) and to which to write a new boot manifest once the graph is locked
+    :param resolution_timeout: how long (in seconds) a thread waits for a component that another
+        thread is creating before assuming a cycle (that crosses threads); `None` waits indefinitely
 
     """
+    if freeze_config and lazy_validation:
+        raise ValueError("Frozen configuration cannot be validated lazily")
+
     metadata = Metadata(
         name=name,
         debug=debug,
@@ -195,11 +421,27 @@ def create_object_graph(
         description=description,
     )
 
+    if boot_manifest is not None:
+        manifest = BootManifest.read(boot_manifest)
+        if manifest is not None:
+            manifest.prefetch()
+
+    if components is not None:
+        registry = registry.subset(components, dependencies)
+
     defaults = registry.defaults
-    config = configure(defaults, metadata, loader)
+    config = configure(
+        defaults,
+        metadata,
+        loader,
+        cache=config_cache,
+        freeze=freeze_config,
+        strict=strict_config,
+        validation=not lazy_validation,
+    )
 
     if profiler is None:
-        profiler = NoopProfiler()
+        profiler = NoopProfiler() if boot_manifest is None else ResolutionProfiler()
 
     if cache is None or isinstance(cache, str):
         cache = create_cache(cache)
@@ -211,6 +453,10 @@ def create_object_graph(
         profiler=profiler,
         cache=cache,
         loader=loader,
+        lazy_validation=lazy_validation,
+        strict_config=strict_config,
+        boot_manifest=boot_manifest,
+        resolution_timeout=resolution_timeout,
     )
 
 
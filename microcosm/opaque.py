@@ -18,11 +18,57 @@ Combining opaque data across an entire fleet of services allows for consistent t
 easier debugging of distributed operations.
 
 """
+from collections import Counter
 from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from contextvars import ContextVar
 from copy import deepcopy
-from typing import Optional
+from functools import partial
+from json import dumps as json_dumps, loads as json_loads
+from pickle import dumps, loads
+from sys import intern
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from microcosm.config.model import Deferred
+from microcosm.config.types import comma_separated_list
+from microcosm.config.validation import typed
+from microcosm.decorators import defaults
+
+
+# casefolded (and interned) forms of recently seen str keys (e.g. header names)
+_casefolded_keys: Dict[str, str] = {}
+MAX_CASEFOLDED_KEYS = 1024
+
+
+def _convert_key(key):
+    try:
+        return _casefolded_keys[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable keys fail later (as they would for any dict)
+        return key
+
+    if not isinstance(key, str):
+        return key
+
+    if key.isascii() and key.islower():
+        # already normalized (for ASCII, casefold() is lower())
+        converted = intern(key)
+    else:
+        converted = intern(key.casefold())
+
+    if len(_casefolded_keys) >= MAX_CASEFOLDED_KEYS:
+        _casefolded_keys.clear()
+    _casefolded_keys[key] = converted
+    return converted
 
 
 class NormalizedDict(dict):  # type: ignore[type-arg]
@@ -30,37 +76,74 @@ class NormalizedDict(dict):  # type: ignore[type-arg]
     Dict where all str keys are lowercase and read methods are case-insensitive.
 
     """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    # encoded forms of this dict (see `Opaque.as_headers()`, etc.); reset on every write
+    _encoded: Optional[Dict[str, Any]] = None
 
-        for key in list(self.keys()):
-            value = super().pop(key)
-            self[key] = value
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        if args or kwargs:
+            self.update(*args, **kwargs)
 
     def __setitem__(self, key, value):
-        super().__setitem__(self._convert_key(key), value)
+        if self._encoded is not None:
+            self._encoded = None
+        dict.__setitem__(self, _convert_key(key), value)
 
     def __getitem__(self, key):
-        return super().__getitem__(self._convert_key(key))
+        return dict.__getitem__(self, _convert_key(key))
 
     def __delitem__(self, key):
-        super().__delitem__(self._convert_key(key))
+        if self._encoded is not None:
+            self._encoded = None
+        dict.__delitem__(self, _convert_key(key))
 
     def __contains__(self, key):
-        return super().__contains__(self._convert_key(key))
+        return dict.__contains__(self, _convert_key(key))
 
     def pop(self, key, *args, **kwargs):
-        return super().pop(self._convert_key(key), *args, **kwargs)
+        if self._encoded is not None:
+            self._encoded = None
+        return dict.pop(self, _convert_key(key), *args, **kwargs)
 
     def get(self, key, *args, **kwargs):
-        return super().get(self._convert_key(key), *args, **kwargs)
+        return dict.get(self, _convert_key(key), *args, **kwargs)
 
     def update(self, *args, **kwargs):
-        for key, value in dict(*args, **kwargs).items():
-            self[key] = value
+        if len(args) > 1:
+            raise TypeError(f"update expected at most 1 argument, got {len(args)}")
+
+        if self._encoded is not None:
+            self._encoded = None
+
+        if args:
+            other = args[0]
+            if type(other) is NormalizedDict:
+                # keys are already normalized
+                dict.update(self, other)
+            elif isinstance(other, dict):
+                dict.update(self, ((_convert_key(key), value) for key, value in other.items()))
+            elif hasattr(other, "keys"):
+                dict.update(self, ((_convert_key(key), other[key]) for key in other.keys()))
+            else:
+                dict.update(self, ((_convert_key(key), value) for key, value in other))
+
+        if kwargs:
+            dict.update(self, ((_convert_key(key), value) for key, value in kwargs.items()))
 
     def setdefault(self, key, *args, **kwargs):
-        super().setdefault(self._convert_key(key), *args, **kwargs)
+        if self._encoded is not None:
+            self._encoded = None
+        return dict.setdefault(self, _convert_key(key), *args, **kwargs)
+
+    def popitem(self):
+        if self._encoded is not None:
+            self._encoded = None
+        return dict.popitem(self)
+
+    def clear(self):
+        if self._encoded is not None:
+            self._encoded = None
+        dict.clear(self)
 
     @classmethod
     def fromkeys(cls, keys, v=None):
@@ -70,16 +153,41 @@ class NormalizedDict(dict):  # type: ignore[type-arg]
         )
         return super().fromkeys(keys, v)
 
-    @staticmethod
-    def _convert_key(key):
-        return key.casefold() if isinstance(key, str) else key
+    _convert_key = staticmethod(_convert_key)
+
+
+# values that can be shared between contexts without copying
+IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None), Deferred)
+
+
+def _copy_store(store):
+    """
+    Copy an opaque store (for a new context).
+
+    Equivalent to a `deepcopy()`, but keys are already normalized and (typically) all values
+    are immutable, so the copy is a C-level shallow copy and only mutable values are deep copied.
+
+    """
+    copy = NormalizedDict.__new__(NormalizedDict)
+    dict.update(copy, store)
+
+    memo = dict()
+    for key, value in dict.items(store):
+        if type(value) not in IMMUTABLE_TYPES:
+            dict.__setitem__(copy, key, deepcopy(value, memo))
+
+    return copy
 
 
 def _make_initializer(opaque):
     @contextmanager
     def initialiser(func, *args, **kwargs):
-        token = opaque._store.set(deepcopy(opaque._store.get()))
-        opaque.update(func(*args, **kwargs))
+        store = _copy_store(opaque._store.get())
+        token = opaque._store.set(store)
+        # NB: bounds are enforced once, below
+        store.update(func(*args, **kwargs))
+        if opaque.bounded:
+            opaque._enforce_bounds()
         try:
             yield
         finally:
@@ -88,6 +196,80 @@ def _make_initializer(opaque):
     return initialiser
 
 
+def _encode_headers(store) -> Dict[str, str]:
+    return {
+        str(key): value if type(value) is str else str(value)
+        for key, value in dict.items(store)
+    }
+
+
+def _encode_message_attributes(store) -> Dict[str, Dict[str, str]]:
+    return {
+        str(key): dict(
+            DataType="String",
+            StringValue=value if type(value) is str else str(value),
+        )
+        for key, value in dict.items(store)
+    }
+
+
+def _encode_json(store) -> str:
+    return json_dumps(store)
+
+
+# configuration keys that define an opaque policy (rather than opaque data)
+POLICY_KEYS = (
+    "allowed_keys",
+    "max_value_bytes",
+    "max_total_bytes",
+)
+
+
+def _size_of(value) -> int:
+    """
+    Compute the (encoded) size of an opaque key or value.
+
+    """
+    if type(value) is str:
+        # NB: avoid encoding short strings; no UTF-8 character exceeds 4 bytes
+        return len(value) if value.isascii() else len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(str(value))
+
+
+# the latest opaque instance for each service name (used to rehydrate opaque data within worker processes)
+_instances: Dict[str, "Opaque"] = {}
+# the last payload rehydrated within this (worker) process
+_last_payload: Optional[Tuple[bytes, NormalizedDict]] = None
+
+
+def _call_in_thread(opaque, snapshot, func, *args, **kwargs):
+    token = opaque._store.set(_copy_store(snapshot))
+    try:
+        return func(*args, **kwargs)
+    finally:
+        opaque._store.reset(token)
+
+
+def _call_in_process(service_name, payload, func, *args, **kwargs):
+    global _last_payload
+
+    opaque = _instances.get(service_name)
+    if opaque is None:
+        # NB: a throwaway instance would silently lose the opaque data
+        raise LookupError(
+            f"No opaque instance named {service_name!r} exists in this worker process; "
+            "create it at import time or with the executor's `initializer`"
+        )
+
+    # tasks from the same batch share a payload; only unpickle it once
+    if _last_payload is None or _last_payload[0] != payload:
+        _last_payload = (payload, NormalizedDict(loads(payload)))
+
+    return _call_in_thread(opaque, _last_payload[1], func, *args, **kwargs)
+
+
 class Opaque(MutableMapping[str, str]):
     """
     Define a dict-like opaque context that can be initialized with application-specific values.
@@ -107,24 +289,63 @@ class Opaque(MutableMapping[str, str]):
         def foo():
             pass
 
+    The function may return `Deferred` values for context that is expensive to compute
+    (and rarely used); these are computed on first read:
+
+        opaque.initialize(lambda: dict(tenant_tier=Deferred(lookup_tier, tenant_id)))
+
+    Opaque data can be bounded by:
+
+     -  An allowlist of keys
+     -  A maximum (encoded) size per value
+     -  A maximum total size (of all keys and values); values that would exceed it are dropped
+
+    Bounds apply on every `initialize`, on later writes (which are ignored if they exceed them),
+    and to deferred values when they are computed (which are then dropped, as if missing).
+
+    Dropped keys and writes are counted (by reason) in `opaque.dropped`.
+
     See tests for usage examples.
 
     """
 
     def __init__(self, *args, **kwargs) -> None:
         self.service_name: Optional[str] = kwargs.pop("name", None)
+        allowed_keys: Optional[Iterable[str]] = kwargs.pop("allowed_keys", None)
+        self.allowed_keys = frozenset(_convert_key(key) for key in allowed_keys) if allowed_keys else None
+        self.max_value_bytes: int = kwargs.pop("max_value_bytes", 0)
+        self.max_total_bytes: int = kwargs.pop("max_total_bytes", 0)
+        self.bounded = bool(self.allowed_keys or self.max_value_bytes or self.max_total_bytes)
+        self.dropped: Counter[str] = Counter()
         self._store = ContextVar("store", default=NormalizedDict(*args, **kwargs))
         self.initialize = _make_initializer(self)
+        if self.service_name is not None:
+            _instances[self.service_name] = self
 
     def __getitem__(self, key):
-        return self._store.get()[key]
+        store = self._store.get()
+        value = store[key]
+        if type(value) is Deferred:
+            value = value.resolve()
+            if self.bounded and self._exceeds_bounds(store, _convert_key(key), value):
+                del store[key]
+                raise KeyError(key)
+            store[key] = value
+        return value
 
     def __setitem__(self, key, value):
-        self._store.get()[key] = value
+        store = self._store.get()
+        if self.bounded and self._exceeds_bounds(store, _convert_key(key), value):
+            return
+        store[key] = value
 
     def __delitem__(self, key):
         del self._store.get()[key]
 
+    def __contains__(self, key):
+        # NB: avoid computing deferred values
+        return key in self._store.get()
+
     def __iter__(self):
         return iter(self._store.get())
 
@@ -132,8 +353,227 @@ class Opaque(MutableMapping[str, str]):
         return len(self._store.get())
 
     def as_dict(self):
-        return self._store.get()
+        store = self._store.get()
+        for key, value in list(dict.items(store)):
+            if type(value) is Deferred:
+                value = value.resolve()
+                if self.bounded and self._exceeds_bounds(store, key, value):
+                    dict.__delitem__(store, key)
+                else:
+                    dict.__setitem__(store, key, value)
+        return store
+
+    def as_headers(self) -> Dict[str, str]:
+        """
+        Encode opaque data as (e.g. HTTP) headers.
+
+        Encoded forms are cached until the opaque data is next written to (within the
+        same context); in-place changes to mutable values are not detected.
+
+        """
+        return dict(self._encode("headers", _encode_headers))
 
+    def as_message_attributes(self) -> Dict[str, Dict[str, str]]:
+        """
+        Encode opaque data as (SNS/SQS-style) message attributes.
 
+        """
+        return dict(self._encode("message_attributes", _encode_message_attributes))
+
+    def as_json(self) -> str:
+        """
+        Encode opaque data as JSON.
+
+        """
+        return self._encode("json", _encode_json)
+
+    def from_headers(self, headers) -> NormalizedDict:
+        """
+        Decode opaque data from (e.g. HTTP) headers.
+
+        Suitable for use with `initialize`:
+
+            with opaque.initialize(opaque.from_headers, request.headers):
+                pass
+
+        Only allowed keys are decoded; inbound headers (e.g. `Authorization`, `Cookie`, `Host`)
+        are not opaque data, so an allowlist is required.
+
+        """
+        return self._decode(headers.items(), require_allowlist=True)
+
+    def from_message_attributes(self, attributes) -> NormalizedDict:
+        """
+        Decode opaque data from (SNS/SQS-style) message attributes.
+
+        Only allowed keys are decoded; an allowlist is required.
+
+        """
+        return self._decode(
+            (
+                (key, attribute["StringValue"])
+                for key, attribute in attributes.items()
+                if "StringValue" in attribute
+            ),
+            require_allowlist=True,
+        )
+
+    def from_json(self, text) -> NormalizedDict:
+        """
+        Decode opaque data from JSON.
+
+        Only allowed keys are decoded (if there is an allowlist).
+
+        """
+        return self._decode(json_loads(text).items())
+
+    def _encode(self, name, encode) -> Any:
+        encoded = self._store.get()._encoded
+        if encoded is not None and name in encoded:
+            return encoded[name]
+
+        store = self.as_dict()
+        if store._encoded is None:
+            store._encoded = dict()
+        value = store._encoded[name] = encode(store)
+        return value
+
+    def _decode(self, items, require_allowlist=False) -> NormalizedDict:
+        if self.allowed_keys is None:
+            if require_allowlist:
+                raise ValueError("Opaque data can only be decoded from headers or attributes with `allowed_keys`")
+            return NormalizedDict(items)
+
+        data = NormalizedDict(items)
+
+        return NormalizedDict({
+            key: value
+            for key, value in dict.items(data)
+            if key in self.allowed_keys
+        })
+
+    def _enforce_bounds(self) -> None:
+        """
+        Drop keys that are not allowed or that exceed the size limits.
+
+        Deferred values are not computed here; they are measured when they are computed.
+
+        """
+        store = self._store.get()
+        allowed_keys = self.allowed_keys
+        max_value_bytes = self.max_value_bytes
+        max_total_bytes = self.max_total_bytes
+        total = 0
+        dropped = None
+
+        for key, value in dict.items(store):
+            if allowed_keys is not None and key not in allowed_keys:
+                reason = "not_allowed"
+            elif type(value) is Deferred:
+                continue
+            else:
+                size = len(value) if type(value) is str and value.isascii() else _size_of(value)
+                if max_value_bytes and size > max_value_bytes:
+                    reason = "value_too_large"
+                else:
+                    size += len(key) if type(key) is str and key.isascii() else _size_of(key)
+                    if max_total_bytes and total + size > max_total_bytes:
+                        reason = "total_too_large"
+                    else:
+                        total += size
+                        continue
+
+            if dropped is None:
+                dropped = []
+            dropped.append((key, reason))
+
+        if dropped is not None:
+            for key, reason in dropped:
+                dict.__delitem__(store, key)
+                self.dropped[reason] += 1
+
+    def _exceeds_bounds(self, store, key, value) -> bool:
+        """
+        Check (and count) whether writing a (normalized) key would exceed the bounds.
+
+        """
+        if self.allowed_keys is not None and key not in self.allowed_keys:
+            reason = "not_allowed"
+        elif type(value) is Deferred:
+            return False
+        else:
+            size = _size_of(value)
+            if self.max_value_bytes and size > self.max_value_bytes:
+                reason = "value_too_large"
+            elif self.max_total_bytes and sum(
+                _size_of(other_key) + _size_of(other_value)
+                for other_key, other_value in dict.items(store)
+                if other_key != key and type(other_value) is not Deferred
+            ) + _size_of(key) + size > self.max_total_bytes:
+                reason = "total_too_large"
+            else:
+                return False
+
+        self.dropped[reason] += 1
+        return True
+
+    def submit(self, executor, func, *args, **kwargs):
+        """
+        Submit work to an executor with (a copy of) the current opaque data.
+
+        Works with both thread and process pool executors; the latter requires a named
+        opaque instance (e.g. `graph.opaque`) and picklable arguments.
+
+        Worker processes that do not inherit the instance (i.e. the "spawn" and "forkserver"
+        start methods; the latter is the Linux default as of Python 3.14) must recreate it,
+        either at import time or with the executor's `initializer` (e.g. by creating the object
+        graph); otherwise tasks raise a `LookupError`.
+
+        """
+        return executor.submit(self._bind(executor, func), *args, **kwargs)
+
+    def map(self, executor, func, *iterables, **kwargs):
+        """
+        Map work over an executor with (a copy of) the current opaque data.
+
+        The opaque data is snapshotted (and, for process pools, serialized) once per call.
+
+        """
+        return executor.map(self._bind(executor, func), *iterables, **kwargs)
+
+    def _bind(self, executor, func) -> Any:
+        snapshot = _copy_store(self.as_dict())
+        if not isinstance(executor, ProcessPoolExecutor):
+            return partial(_call_in_thread, self, snapshot, func)
+
+        if self.service_name is None:
+            raise ValueError("Opaque data can only be sent to worker processes from a named instance")
+        return partial(_call_in_process, self.service_name, dumps(dict(snapshot)), func)
+
+
+@defaults(
+    allowed_keys=typed(comma_separated_list, default_value=""),
+    max_value_bytes=typed(int, default_value=0),
+    max_total_bytes=typed(int, default_value=0),
+)
 def configure_opaque(graph) -> Opaque:
-    return Opaque(graph.config.opaque, name=graph.metadata.name)
+    """
+    Configure opaque data (and its bounds).
+
+    Keys other than `allowed_keys`, `max_value_bytes`, and `max_total_bytes` are used
+    as the initial opaque data; these three keys are reserved and can not be used as
+    (initial) opaque data.
+
+    """
+    config = graph.config.opaque
+    return Opaque(
+        {
+            key: value
+            for key, value in dict.items(config)
+            if key not in POLICY_KEYS
+        },
+        name=graph.metadata.name,
+        allowed_keys=config.allowed_keys,
+        max_value_bytes=config.max_value_bytes,
+        max_total_bytes=config.max_total_bytes,
+    )
@@ -2,7 +2,26 @@
 Factory loading profiling
 
 """
-from time import time
+from sys import _current_frames
+from threading import (
+    Event,
+    Thread,
+    get_ident,
+    local,
+)
+from time import monotonic, time
+from traceback import format_stack
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+)
+from warnings import warn
 
 
 class NoopProfiler:
@@ -21,7 +40,17 @@ class TimingProfiler:
 
     def __init__(self):
         self.times = dict()
-        self.current = []
+        # NB: components may be resolved by several threads at once
+        self.local = local()
+
+    @property
+    def current(self):
+        # keys being timed by the current thread (innermost last)
+        try:
+            return self.local.current
+        except AttributeError:
+            current = self.local.current = []
+            return current
 
     def __call__(self, key):
         self.current.append(key)
@@ -42,3 +71,293 @@ class TimingProfiler:
                     key=lambda item: -item[1],
             )[0:20]
         )
+
+
+class ResolutionProfiler(TimingProfiler):
+    """
+    Profiler that also records the order in which components are resolved and the time
+    spent in each factory excluding the resolution of its dependencies ("self" time).
+
+    """
+    def __init__(self):
+        super().__init__()
+        self.order = []
+        self.self_times = dict()
+
+    @property
+    def nested(self):
+        # time spent resolving dependencies of each (active) key of the current thread
+        try:
+            return self.local.nested
+        except AttributeError:
+            nested = self.local.nested = []
+            return nested
+
+    def __enter__(self):
+        self.order.append(self.current[-1])
+        self.nested.append(0.0)
+        super().__enter__()
+
+    def __exit__(self, *args, **kwargs):
+        key = self.current[-1]
+        super().__exit__(*args, **kwargs)
+        self.self_times[key] = self.times[key] - self.nested.pop()
+        if self.nested:
+            self.nested[-1] += self.times[key]
+
+
+class CriticalPathReport:
+    """
+    Critical path analysis of graph construction.
+
+    Treats each resolved component as a task that takes its self time and that can start
+    once all of its dependencies are resolved; the critical path is the longest (weighted)
+    chain of dependent components and its length is the best achievable parallel boot time.
+
+    The slack of a component is how much its resolution could be delayed (or slowed down)
+    without delaying the graph as a whole.
+
+    """
+    def __init__(self, dependencies: Mapping[str, Iterable[str]], self_times: Mapping[str, float]) -> None:
+        """
+        :param dependencies: the keys accessed by each component (see `ObjectGraph.get_dependencies()`)
+        :param self_times: the self time of each component (see `ResolutionProfiler`)
+
+        """
+        self.dependencies = {
+            key: [dependency for dependency in keys if dependency in dependencies]
+            for key, keys in dependencies.items()
+        }
+        self.self_times = {key: self_times.get(key, 0.0) for key in self.dependencies}
+
+        order = self._topological_order()
+
+        self.earliest_start: Dict[str, float] = dict()
+        self.earliest_finish: Dict[str, float] = dict()
+        for key in order:
+            self.earliest_start[key] = max(
+                (self.earliest_finish[dependency] for dependency in self.dependencies[key]),
+                default=0.0,
+            )
+            self.earliest_finish[key] = self.earliest_start[key] + self.self_times[key]
+
+        self.parallel_time = max(self.earliest_finish.values(), default=0.0)
+        self.serial_time = sum(self.self_times.values())
+
+        self.latest_finish: Dict[str, float] = {key: self.parallel_time for key in order}
+        for key in reversed(order):
+            latest_start = self.latest_finish[key] - self.self_times[key]
+            for dependency in self.dependencies[key]:
+                self.latest_finish[dependency] = min(self.latest_finish[dependency], latest_start)
+
+        self.slack = {
+            key: self.latest_finish[key] - self.earliest_finish[key]
+            for key in order
+        }
+
+        self.path: List[str] = []
+        candidates = list(self.earliest_finish)
+        while candidates:
+            key = max(candidates, key=lambda candidate: self.earliest_finish[candidate])
+            self.path.append(key)
+            candidates = self.dependencies[key]
+        self.path.reverse()
+
+    @classmethod
+    def from_graph(cls, graph: Any) -> "CriticalPathReport":
+        """
+        Analyze the components resolved by a graph.
+
+        :raises ValueError: if the graph's profiler does not record self times
+
+        """
+        self_times = getattr(graph._profiler, "self_times", None)
+        if self_times is None:
+            raise ValueError("Critical path analysis requires a ResolutionProfiler")
+        return cls(graph.get_dependencies(), self_times)
+
+    def _topological_order(self) -> List[str]:
+        """
+        Order keys so that every key follows its dependencies.
+
+        """
+        remaining = {key: len(set(keys)) for key, keys in self.dependencies.items()}
+        dependents: Dict[str, List[str]] = {key: [] for key in self.dependencies}
+        for key, keys in self.dependencies.items():
+            for dependency in set(keys):
+                dependents[dependency].append(key)
+
+        order = [key for key, count in remaining.items() if not count]
+        for key in order:
+            for dependent in dependents[key]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    order.append(dependent)
+        return order
+
+    def __str__(self) -> str:
+        lines = [
+            "serial time: {:10.8f}".format(self.serial_time),
+            "parallel time: {:10.8f}".format(self.parallel_time),
+            "critical path:",
+        ]
+        lines.extend(
+            "  {:10.8f} - {}".format(self.self_times[key], key)
+            for key in self.path
+        )
+        lines.append("slack:")
+        lines.extend(
+            "  {:10.8f} - {}".format(value, key)
+            for key, value in sorted(self.slack.items(), key=lambda item: -item[1])
+        )
+        return "\n".join(lines)
+
+
+class SlowFactory(NamedTuple):
+    """
+    A factory that exceeded its budget.
+
+    """
+    key: str
+    # the keys being resolved by the same thread (outermost first)
+    parents: List[str]
+    elapsed: float
+    stack: str
+
+
+def warn_slow_factory(slow_factory: SlowFactory) -> None:
+    warn("Factory for {} has been running for {:.3f}s (resolving: {})\n{}".format(
+        slow_factory.key,
+        slow_factory.elapsed,
+        " -> ".join(slow_factory.parents + [slow_factory.key]),
+        slow_factory.stack,
+    ))
+
+
+class _InFlight:
+    __slots__ = ("key", "start", "reported")
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.start = monotonic()
+        self.reported = False
+
+
+class _Watch:
+    __slots__ = ("watchdog", "key", "context")
+
+    def __init__(self, watchdog: "WatchdogProfiler", key: str) -> None:
+        self.watchdog = watchdog
+        self.key = key
+
+    def __enter__(self):
+        self.watchdog._push(self.key)
+        self.context = self.watchdog.profiler(self.key)
+        return self.context.__enter__()
+
+    def __exit__(self, *args, **kwargs):
+        try:
+            return self.context.__exit__(*args, **kwargs)
+        finally:
+            self.watchdog._pop()
+
+
+class WatchdogProfiler:
+    """
+    Profiler that reports factories that exceed a time budget while they are still running.
+
+    A (lazily started) daemon thread periodically checks the factories in flight; the
+    innermost factory of each thread that exceeds the budget is reported once, along with
+    its in-flight parents and a sample of its thread's stack. Parents are not reported while
+    a reported child is in flight, but are reported if they are still slow after it returns.
+
+    Resolution itself only pushes and pops a per-thread stack (and delegates to another
+    profiler, if any), so fast factories pay no measurable cost.
+
+    """
+    def __init__(
+        self,
+        budget: float,
+        report: Optional[Callable[[SlowFactory], Any]] = None,
+        interval: Optional[float] = None,
+        profiler: Any = None,
+    ) -> None:
+        """
+        :param budget: the time (in seconds) a factory may take before it is reported
+        :param report: a function that is called for each slow factory (defaults to a warning)
+        :param interval: how often (in seconds) to check for slow factories (defaults to a quarter of the budget)
+        :param profiler: another profiler to delegate to
+
+        """
+        self.budget = budget
+        self.report = report or warn_slow_factory
+        self.interval = interval if interval is not None else budget / 4
+        self.profiler = profiler or NoopProfiler()
+        # thread ident -> stack of in-flight factories (innermost last)
+        self.in_flight: Dict[int, List[_InFlight]] = {}
+        self.stopped = Event()
+        self.thread: Optional[Thread] = None
+
+    def __call__(self, key: str) -> _Watch:
+        return _Watch(self, key)
+
+    def _push(self, key: str) -> None:
+        if self.thread is None:
+            self.start()
+        self.in_flight.setdefault(get_ident(), []).append(_InFlight(key))
+
+    def _pop(self) -> None:
+        ident = get_ident()
+        stack = self.in_flight[ident]
+        stack.pop()
+        if not stack:
+            del self.in_flight[ident]
+
+    def start(self) -> None:
+        self.stopped.clear()
+        self.thread = Thread(target=self._monitor, name="microcosm-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.thread = None
+
+    def check(self) -> List[SlowFactory]:
+        """
+        Report (and return) any newly slow factories.
+
+        """
+        now = monotonic()
+        frames = None
+        slow_factories = []
+
+        for ident, stack in list(self.in_flight.items()):
+            stack = list(stack)
+            for index in reversed(range(len(stack))):
+                entry = stack[index]
+                if entry.reported:
+                    # parents of a reported (in-flight) factory are (at least) as slow; skip them
+                    break
+                if now - entry.start <= self.budget:
+                    continue
+                if frames is None:
+                    frames = _current_frames()
+                frame = frames.get(ident)
+                slow_factories.append(SlowFactory(
+                    key=entry.key,
+                    parents=[parent.key for parent in stack[:index]],
+                    elapsed=now - entry.start,
+                    stack="".join(format_stack(frame)) if frame is not None else "",
+                ))
+                entry.reported = True
+                break
+
+        for slow_factory in slow_factories:
+            self.report(slow_factory)
+        return slow_factories
+
+    def _monitor(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.check()
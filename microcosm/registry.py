@@ -7,13 +7,18 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
     Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
     Tuple,
 )
 
 from lazy import lazy
 
-from microcosm.constants import DEFAULTS
+from microcosm.constants import DEFAULTS, DEPENDENCIES
 from microcosm.errors import AlreadyBoundError, NotBoundError
 from microcosm.typing import Component
 
@@ -35,6 +40,14 @@ def get_defaults(func: Callable[[Any], Component]) -> Dict[str, Any]:
     return getattr(func, DEFAULTS, {})
 
 
+def get_dependencies(func: Callable[[Any], Component]) -> Sequence[str]:
+    """
+    Retrieve the declared dependencies for a factory function.
+
+    """
+    return getattr(func, DEPENDENCIES, ())
+
+
 class Registry:
     """
     Registry of component factories.
@@ -102,6 +115,55 @@ class Registry:
         except NotBoundError:
             return self._resolve_from_entry_point(key)
 
+    def subset(
+        self,
+        keys: Iterable[str],
+        dependencies: Optional[Mapping[str, Iterable[str]]] = None,
+    ) -> "Registry":
+        """
+        Create a registry restricted to some keys and their (transitive) dependencies.
+
+        Dependencies are taken from the `dependencies` manifest (e.g. as recorded by
+        `ObjectGraph.get_dependencies()`) and from factory declarations (see `depends_on`).
+
+        Only the entry points for keys in the subset are loaded.
+
+        """
+        if dependencies is None:
+            dependencies = dict()
+
+        # NB: enumerating entry points does not import them
+        available = {
+            entry_point.name: entry_point
+            for entry_point in iter_entry_points(group="microcosm.factories")
+        }
+        factories: Dict[str, Callable[[Any], Component]] = dict()
+        entry_points: Dict[str, Callable[[Any], Component]] = dict()
+        closure: Set[str] = set()
+        pending = list(keys)
+
+        while pending:
+            key = pending.pop()
+            if key in closure:
+                continue
+            closure.add(key)
+
+            if key in self.factories:
+                factory = factories[key] = self.factories[key]
+            elif key in available:
+                factory = entry_points[key] = available[key].load()
+            else:
+                # not bound; resolving the key will fail as usual
+                continue
+
+            pending.extend(dependencies.get(key, ()))
+            pending.extend(get_dependencies(factory))
+
+        registry = Registry()
+        registry.factories = factories
+        registry.entry_points = entry_points
+        return registry
+
     def _iter_entry_points(self) -> Iterator[Tuple[str, Callable[[Any], Component]]]:
         for entry_point in iter_entry_points(group="microcosm.factories"):
             factory = entry_point.load()
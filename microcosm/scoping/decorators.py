@@ -6,8 +6,8 @@ from microcosm.decorators import binding
 from microcosm.scoping.factories import ScopedFactory
 
 
-def scoped_binding(key: str, default_scope=None, registry=None):
+def scoped_binding(key: str, default_scope=None, registry=None, cache_methods: bool = False):
     def decorator(func):
-        binding(key, registry)(ScopedFactory(key, func, default_scope))
+        binding(key, registry)(ScopedFactory(key, func, default_scope, cache_methods))
         return func
     return decorator
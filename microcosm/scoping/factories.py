@@ -2,6 +2,20 @@
 A factory that enables scoping.
 
 """
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
 from microcosm.config.api import configure
 from microcosm.config.model import Configuration
 from microcosm.object_graph import Factory, ObjectGraph
@@ -34,28 +48,86 @@ class ScopedFactory:
     Could be used with the same underlying factory to refer to either "host1" or "host2"
     depending on the current scope.
 
+    The current scope is a context variable, so different threads (and asyncio tasks)
+    can use different scopes concurrently.
+
+    If `cache_methods` is set, proxies cache the bound methods of each scoped component,
+    which is only safe if components do not reassign their methods.
+
     """
-    def __init__(self, key: str, func: Factory, default_scope=None):
+    def __init__(self, key: str, func: Factory, default_scope=None, cache_methods: bool = False):
         self.key = key
         self.func = func
-        self.current_scope = default_scope
         self.default_scope = default_scope
+        self.cache_methods = cache_methods
+        self._scope: ContextVar[Any] = ContextVar(f"{key}.scope", default=default_scope)
+        self._scoped_keys: Dict[Any, str] = {}
+
+    @property
+    def current_scope(self):
+        return self._scope.get()
+
+    @current_scope.setter
+    def current_scope(self, scope):
+        # NB: sets the scope for the current context (only); prefer `scoped_to()`
+        self._scope.set(scope)
+
+    @contextmanager
+    def scoped_to(self, scope) -> Iterator[None]:
+        """
+        Context manager to switch scopes (within the current context).
+
+        """
+        token = self._scope.set(scope)
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
 
     @property
     def scoped_key(self):
+        scope = self._scope.get()
+        try:
+            return self._scoped_keys[scope]
+        except KeyError:
+            # NB: deliberately conflating false-y values
+            scoped_key = self._scoped_keys[scope] = "{}.{}".format(scope or "", self.key)
+            return scoped_key
+
+    def get_scoped_graph(self, graph: ObjectGraph) -> ScopedGraph:
+        """
+        Get a view of the graph using the configuration for the current scope.
+
+        Scoped configuration is computed once per scope (and graph); it is stored on the
+        graph so that it does not outlive it.
+
+        """
         # NB: deliberately conflating false-y values
-        return "{}.{}".format(self.current_scope or "", self.key)
+        key = (self.key, self._scope.get() or None)
+        scoped_graphs = graph._scoped_graphs
+        try:
+            return scoped_graphs[key]
+        except KeyError:
+            scoped_graph = scoped_graphs[key] = ScopedGraph(graph, self._configure(graph, key[1]))
+            return scoped_graph
 
     def get_scoped_config(self, graph: ObjectGraph) -> Configuration:
         """
         Compute a configuration using the current scope.
 
+        """
+        return self.get_scoped_graph(graph).config
+
+    def _configure(self, graph: ObjectGraph, current_scope: Any) -> Configuration:
+        """
+        Compute a configuration for a scope.
+
         """
         def loader(metadata):
-            if not self.current_scope:
+            if not current_scope:
                 target = graph.config
             else:
-                target = graph.config.get(self.current_scope, {})
+                target = graph.config.get(current_scope, {})
             return {
                 self.key: target.get(self.key, {}),
             }
@@ -77,26 +149,77 @@ class ScopedFactory:
         """
         Resolve a scoped component, respecting the graph cache.
 
+        Each scoped component is created once, even if it is resolved concurrently.
+
+        """
+        return graph._create_once(self.scoped_key, lambda: self.create(graph))
+
+    def discover_scopes(self, graph: ObjectGraph) -> List[str]:
+        """
+        Find the scopes that configure this factory's key.
+
+        """
+        return [
+            scope
+            for scope, value in dict.items(graph.config)
+            if isinstance(value, dict) and self.key in value
+        ]
+
+    def materialize(
+        self,
+        graph: ObjectGraph,
+        scopes: Optional[Iterable[Any]] = None,
+        max_workers: Optional[int] = None,
+        progress: Optional[Callable[[Any, float, int, int], Any]] = None,
+    ) -> Dict[Any, float]:
         """
-        cached = graph.get(self.scoped_key)
-        if cached:
-            return cached
+        Eagerly (and concurrently) create the scoped component for a set of scopes.
+
+        Shared components (e.g. those used by every scope) are still created once; scopes that
+        need a shared component that is being created wait for it.
+
+        :param graph: the object graph
+        :param scopes: the scopes to materialize (defaults to all discovered scopes)
+        :param max_workers: the maximum number of worker threads
+        :param progress: a function called with the scope, its time (in seconds), the number
+            of scopes completed, and the total number of scopes as each scope completes
+        :returns: the time (in seconds) taken to materialize each scope
+
+        """
+        scopes = list(self.discover_scopes(graph) if scopes is None else scopes)
+
+        def materialize_scope(scope):
+            start = perf_counter()
+            with self.scoped_to(scope):
+                self.resolve(graph)
+            return perf_counter() - start
+
+        timings: Dict[Any, float] = {}
+        if not scopes:
+            return timings
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="microcosm-materialize") as executor:
+            futures = {
+                executor.submit(materialize_scope, scope): scope
+                for scope in scopes
+            }
+            for future in as_completed(futures):
+                scope = futures[future]
+                timings[scope] = future.result()
+                if progress is not None:
+                    progress(scope, timings[scope], len(timings), len(scopes))
 
-        component = self.create(graph)
-        graph.assign(self.scoped_key, component)
-        return component
+        return timings
 
     def create(self, graph: ObjectGraph) -> Component:
         """
         Create a new scoped component.
 
         """
-        scoped_config = self.get_scoped_config(graph)
-        scoped_graph = ScopedGraph(graph, scoped_config)
-        return self.func(scoped_graph)
+        return self.func(self.get_scoped_graph(graph))
 
     @classmethod
-    def infect(cls, graph: ObjectGraph, key: str, default_scope=None) -> Factory:
+    def infect(cls, graph: ObjectGraph, key: str, default_scope=None, cache_methods: bool = False) -> Factory:
         """
         Forcibly convert an entry-point based factory to a ScopedFactory.
 
@@ -108,6 +231,6 @@ class ScopedFactory:
         func = graph.factory_for(key)
         if isinstance(func, cls):
             func = func.func
-        factory = cls(key, func, default_scope)
+        factory = cls(key, func, default_scope, cache_methods)
         graph._registry.factories[key] = factory
         return factory
@@ -11,6 +11,8 @@ class ScopedGraph(ObjectGraph):
         self._graph = graph
         self.config = config
         self.metadata = graph.metadata
+        # NB: scoped graphs of this view are computed from its (scoped) configuration
+        self._scoped_graphs = {}
 
     def __getattr__(self, key):
         return getattr(self._graph, key)
@@ -28,8 +28,8 @@ That is, this idiom will **NOT** work:
         bar.something()
 
 """
-from contextlib import contextmanager
 from functools import wraps
+from inspect import ismethod
 
 
 class ScopedProxy:
@@ -38,38 +38,60 @@ class ScopedProxy:
 
     Only proxies the attribute access and callables.
 
+    Resolved components (and, optionally, bound methods) are cached per scope, for as long
+    as they are the graph's component for that scope (e.g. until `graph.assign()` replaces them).
+
     """
     __slots__ = (
         "__graph__",
         "__factory__",
+        "__components__",
+        "__methods__",
     )
 
     def __init__(self, graph, factory):
         self.__graph__ = graph
         self.__factory__ = factory
+        self.__components__ = {}
+        self.__methods__ = {} if factory.cache_methods else None
 
     @property
     def __component__(self):
-        return self.__factory__.resolve(self.__graph__)
+        return _resolve(self, _get_factory(self)._scope.get())
 
     def __call__(self, *args, **kwargs):
         return self.__component__(*args, **kwargs)
 
+    def __getattribute__(self, attr):
+        # NB: avoid the (costly) failed lookup that precedes `__getattr__` for component attributes
+        if attr.startswith("__") or attr in PROXY_ATTRIBUTES:
+            return object.__getattribute__(self, attr)
+
+        scope = _get_factory(self)._scope.get()
+        component = _resolve(self, scope)
+        methods = _get_methods(self)
+        if methods is None:
+            return getattr(component, attr)
+
+        key = (scope, attr)
+        method = methods.get(key)
+        if method is not None and method.__self__ is component:
+            return method
+
+        value = getattr(component, attr)
+        if ismethod(value):
+            methods[key] = value
+        return value
+
     def __getattr__(self, attr):
         return getattr(self.__component__, attr)
 
-    @contextmanager
     def scoped_to(self, scope):
         """
         Context manager to switch scopes.
 
         """
-        previous_scope = self.__factory__.current_scope
-        try:
-            self.__factory__.current_scope = scope
-            yield
-        finally:
-            self.__factory__.current_scope = previous_scope
+        return self.__factory__.scoped_to(scope)
 
     def scoped(self, func):
         """
@@ -82,3 +104,31 @@ class ScopedProxy:
             with self.scoped_to(scope):
                 return func(*args, **kwargs)
         return wrapper
+
+
+# proxy attributes that are not dunders
+PROXY_ATTRIBUTES = frozenset(("scoped", "scoped_to"))
+
+# NB: slot accessors that bypass `ScopedProxy.__getattribute__`
+_get_graph = ScopedProxy.__dict__["__graph__"].__get__
+_get_factory = ScopedProxy.__dict__["__factory__"].__get__
+_get_components = ScopedProxy.__dict__["__components__"].__get__
+_get_methods = ScopedProxy.__dict__["__methods__"].__get__
+
+
+def _resolve(proxy, scope):
+    graph = _get_graph(proxy)
+    components = _get_components(proxy)
+    try:
+        scoped_key, component = components[scope]
+    except KeyError:
+        pass
+    else:
+        # NB: the graph's component may have been replaced
+        if graph._cache.get(scoped_key) is component:
+            return component
+
+    factory = _get_factory(proxy)
+    component = factory.resolve(graph)
+    components[scope] = (factory.scoped_key, component)
+    return component
@@ -0,0 +1,113 @@
+"""
+Test configuration memoization.
+
+"""
+from hamcrest import (
+    assert_that,
+    equal_to,
+    is_,
+    is_not,
+    same_instance,
+)
+
+from microcosm.api import (
+    binding,
+    create_object_graph,
+    defaults,
+    load_from_dict,
+    required,
+)
+from microcosm.config.api import configure
+from microcosm.config.cache import ConfigurationCache, freeze_value
+from microcosm.metadata import Metadata
+from microcosm.registry import Registry
+
+
+class TestConfigurationCache:
+
+    def setup_method(self):
+        self.cache = ConfigurationCache()
+        self.registry = Registry()
+
+        @binding("foo", registry=self.registry)
+        @defaults(value=required(int))
+        def configure_foo(graph):
+            return graph.config.foo.value
+
+    def test_hit(self):
+        loader = load_from_dict(foo=dict(value="1"))
+
+        first = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache)
+        second = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache)
+
+        assert_that(first.foo.value, is_(equal_to(1)))
+        assert_that(second, is_(same_instance(first)))
+        assert_that(self.cache.hits, is_(equal_to(1)))
+        assert_that(self.cache.misses, is_(equal_to(1)))
+        assert_that(self.cache.hit_rate, is_(equal_to(0.5)))
+
+    def test_miss_on_changed_inputs(self):
+        configure(self.registry.defaults, Metadata("test"), load_from_dict(foo=dict(value="1")), cache=self.cache)
+        configure(self.registry.defaults, Metadata("test"), load_from_dict(foo=dict(value="2")), cache=self.cache)
+        configure(
+            self.registry.defaults,
+            Metadata("test", testing=True),
+            load_from_dict(foo=dict(value="2")),
+            cache=self.cache,
+        )
+
+        assert_that(self.cache.hits, is_(equal_to(0)))
+        assert_that(len(self.cache), is_(equal_to(3)))
+
+    def test_results_are_frozen_by_default(self):
+        loader = load_from_dict(foo=dict(value="1"))
+
+        first = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache)
+        second = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache)
+
+        assert_that(first.is_frozen(), is_(True))
+        assert_that(second, is_(same_instance(first)))
+
+    def test_unvalidated_results_are_not_frozen(self):
+        loader = load_from_dict(foo=dict(value="1"))
+
+        config = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache, validation=False)
+
+        assert_that(config.is_frozen(), is_(False))
+
+    def test_mutable_results_are_isolated(self):
+        cache = ConfigurationCache(freeze=False)
+        loader = load_from_dict(foo=dict(value="1"))
+
+        first = configure(self.registry.defaults, Metadata("test"), loader, cache=cache)
+        first.foo.value = 2
+
+        second = configure(self.registry.defaults, Metadata("test"), loader, cache=cache)
+        assert_that(second.foo.value, is_(equal_to(1)))
+
+    def test_frozen_results_are_shared(self):
+        loader = load_from_dict(foo=dict(value="1"))
+
+        first = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache, freeze=True)
+        second = configure(self.registry.defaults, Metadata("test"), loader, cache=self.cache, freeze=True)
+
+        assert_that(second, is_(same_instance(first)))
+        assert_that(self.cache.hits, is_(equal_to(1)))
+
+    def test_create_object_graph(self):
+        loader = load_from_dict(foo=dict(value="1"))
+
+        for _ in range(3):
+            graph = create_object_graph("test", registry=self.registry, loader=loader, config_cache=self.cache)
+            assert_that(graph.foo, is_(equal_to(1)))
+
+        assert_that(self.cache.hits, is_(equal_to(2)))
+
+
+def test_freeze_value():
+    assert_that(
+        freeze_value(dict(foo=[1, dict(bar="baz")])),
+        is_(equal_to(freeze_value(dict(foo=[1, dict(bar="baz")])))),
+    )
+    assert_that(freeze_value(dict(foo=True)), is_not(equal_to(freeze_value(dict(foo=1)))))
+    assert_that(freeze_value([1]), is_not(equal_to(freeze_value((1, )))))
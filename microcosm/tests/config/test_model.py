@@ -2,6 +2,10 @@
 Tests for configuration
 
 """
+from copy import deepcopy
+from json import dumps as json_dumps
+from pickle import dumps, loads
+
 from hamcrest import (
     assert_that,
     calling,
@@ -13,7 +17,8 @@ from hamcrest import (
     raises,
 )
 
-from microcosm.config.model import Configuration
+from microcosm.config.model import Configuration, Deferred
+from microcosm.errors import FrozenConfigurationError
 
 
 def test_attribute_access():
@@ -109,3 +114,237 @@ def test_merge_lists():
     assert_that(config["lst2"], is_(equal_to((3, 4))))
     assert_that(config["tpl1"], is_(equal_to((3, 4))))
     assert_that(config["tpl2"], is_(equal_to([3, 4])))
+
+
+def test_freeze():
+    """
+    Frozen configuration is deeply immutable.
+
+    """
+    config = Configuration(
+        key="value",
+        nested=dict(
+            nested_key="nested_value",
+            entries=[1, dict(inner="value")],
+        ),
+    ).freeze()
+
+    assert_that(config.is_frozen(), is_(equal_to(True)))
+    assert_that(config.nested.is_frozen(), is_(equal_to(True)))
+    assert_that(config.nested.entries, is_(equal_to((1, dict(inner="value")))))
+    assert_that(config.nested.entries[1].is_frozen(), is_(equal_to(True)))
+
+    assert_that(calling(setattr).with_args(config, "key", "other"), raises(FrozenConfigurationError))
+    assert_that(calling(config.nested.__setitem__).with_args("key", "other"), raises(FrozenConfigurationError))
+    assert_that(calling(config.nested.__delitem__).with_args("nested_key"), raises(FrozenConfigurationError))
+    assert_that(calling(config.merge).with_args(key="other"), raises(FrozenConfigurationError))
+    assert_that(calling(config.pop).with_args("key"), raises(FrozenConfigurationError))
+    assert_that(calling(config.update).with_args(key="other"), raises(FrozenConfigurationError))
+    assert_that(calling(config.clear), raises(FrozenConfigurationError))
+
+
+def test_freeze_hash():
+    """
+    Frozen configuration is hashable by structure.
+
+    """
+    config = Configuration(key="value", nested=dict(nested_key=[1, 2]))
+    assert_that(calling(hash).with_args(config), raises(TypeError))
+
+    config.freeze()
+    other = Configuration(nested=dict(nested_key=[1, 2]), key="value").freeze()
+
+    assert_that(hash(config), is_(equal_to(hash(other))))
+    assert_that({config: "found"}[other], is_(equal_to("found")))
+    assert_that({config.nested: "found"}[other.nested], is_(equal_to("found")))
+
+
+def test_freeze_nested_sequences():
+    """
+    Freezing recurses into dictionaries within (nested) sequences.
+
+    """
+    config = Configuration(a=[[dict(b=1)]], c={frozenset([1])}).freeze()
+
+    assert_that(config.a[0][0].is_frozen(), is_(equal_to(True)))
+    assert_that(hash(config), is_(equal_to(hash(Configuration(a=[[dict(b=1)]], c={frozenset([1])}).freeze()))))
+
+
+def test_freeze_copy():
+    """
+    Frozen configuration survives copying and pickling; thawing is mutable.
+
+    """
+    config = Configuration(key="value", nested=dict(nested_key="nested_value")).freeze()
+
+    for copied in (deepcopy(config), loads(dumps(config))):
+        assert_that(copied, is_(equal_to(config)))
+        assert_that(copied.is_frozen(), is_(equal_to(True)))
+        assert_that(copied.nested.nested_key, is_(equal_to("nested_value")))
+
+    thawed = config.thaw()
+    thawed.nested.nested_key = "other_value"
+    assert_that(thawed.is_frozen(), is_(equal_to(False)))
+    assert_that(config.nested.nested_key, is_(equal_to("nested_value")))
+
+
+def test_thaw_sequences():
+    """
+    Thawing restores lists (and sets), so that merging appends again.
+
+    """
+    config = Configuration(lst=[1, [dict(inner=[2])]], st={1}).freeze().thaw()
+
+    assert_that(config.lst, is_(equal_to([1, [dict(inner=[2])]])))
+    assert_that(config.lst[1][0].inner, is_(equal_to([2])))
+    assert_that(config.st, is_(equal_to({1})))
+
+    config.merge(lst=[3])
+    assert_that(config.lst, is_(equal_to([1, [dict(inner=[2])], 3])))
+
+
+def test_get_path():
+    """
+    Configuration supports deep lookups by key path.
+
+    """
+    config = Configuration(
+        key="value",
+        nested=dict(
+            nested_key="nested_value",
+            deeper=dict(
+                deeper_key="deeper_value",
+            ),
+        ),
+    )
+    assert_that(config.get_path("key"), is_(equal_to("value")))
+    assert_that(config.get_path("nested.deeper.deeper_key"), is_(equal_to("deeper_value")))
+    assert_that(config.get_path(("nested", "deeper", "deeper_key")), is_(equal_to("deeper_value")))
+    assert_that(config.get_path(["nested", "nested_key"]), is_(equal_to("nested_value")))
+    assert_that(config.get_path("nested.deeper"), is_(equal_to(dict(deeper_key="deeper_value"))))
+    assert_that(config.get_path("nested.missing"), is_(equal_to(None)))
+    assert_that(config.get_path("nested.missing", "default"), is_(equal_to("default")))
+
+
+def test_get_path_invalidation():
+    """
+    Mutations (at any depth) are reflected in key path lookups.
+
+    """
+    config = Configuration(
+        nested=dict(
+            deeper=dict(
+                deeper_key="deeper_value",
+            ),
+        ),
+    )
+    assert_that(config.get_path("nested.deeper.deeper_key"), is_(equal_to("deeper_value")))
+
+    config.nested.deeper.deeper_key = "new_value"
+    assert_that(config.get_path("nested.deeper.deeper_key"), is_(equal_to("new_value")))
+
+    config.merge(nested=dict(other_key="other_value"))
+    assert_that(config.get_path("nested.other_key"), is_(equal_to("other_value")))
+
+    config.nested = dict(replaced=True)
+    assert_that(config.get_path("nested.deeper.deeper_key"), is_(equal_to(None)))
+    assert_that(config.get_path("nested.replaced"), is_(equal_to(True)))
+
+    del config.nested["replaced"]
+    assert_that(config.get_path("nested.replaced"), is_(equal_to(None)))
+
+
+def test_deferred():
+    """
+    Deferred values are resolved once, on first access.
+
+    """
+    calls = []
+
+    def compute():
+        calls.append(True)
+        return dict(nested_key="nested_value")
+
+    config = Configuration(key=Deferred(compute), other=Deferred(compute))
+    assert_that(calls, is_(equal_to([])))
+
+    assert_that(config.key, is_(instance_of(Configuration)))
+    assert_that(config.key.nested_key, is_(equal_to("nested_value")))
+    assert_that(config["key"], has_entry("nested_key", "nested_value"))
+    assert_that(calls, is_(equal_to([True])))
+
+    assert_that(config.get("other"), has_entry("nested_key", "nested_value"))
+    assert_that(calls, is_(equal_to([True, True])))
+
+
+def test_deferred_get_path():
+    """
+    Paths below deferred values resolve them.
+
+    """
+    calls = []
+
+    def compute():
+        calls.append(True)
+        return dict(nested=dict(key="value"))
+
+    config = Configuration(dict(deferred=Deferred(compute), other=Deferred(lambda: "value")))
+    assert_that(config.get_path("deferred.nested.key"), is_(equal_to("value")))
+    assert_that(config.get_path(("deferred", "nested", "key")), is_(equal_to("value")))
+    assert_that(config.get_path("deferred.missing", "default"), is_(equal_to("default")))
+    assert_that(config.get_path("other.missing", "default"), is_(equal_to("default")))
+    assert_that(config.get_path("missing.key"), is_(equal_to(None)))
+    assert_that(calls, is_(equal_to([True])))
+
+
+def test_deferred_merge_and_freeze():
+    """
+    Merging replaces deferred values without resolving them; freezing resolves them.
+
+    """
+    config = Configuration(
+        replaced=Deferred(lambda: 1 / 0),
+        kept=Deferred(lambda: "value"),
+    )
+    config.merge(replaced="value")
+    assert_that(config.replaced, is_(equal_to("value")))
+
+    config.freeze()
+    assert_that(dict(config), is_(equal_to(dict(replaced="value", kept="value"))))
+    assert_that(loads(dumps(config)), is_(equal_to(config)))
+
+
+def test_deferred_bulk_access():
+    """
+    Bulk accessors and comparisons resolve deferred values.
+
+    """
+    def make_config():
+        return Configuration(
+            foo=dict(value=Deferred(lambda: "value")),
+            bar=Deferred(lambda: dict(nested="nested")),
+        )
+
+    config = make_config()
+    assert_that(dict(config.foo), is_(equal_to(dict(value="value"))))
+    assert_that(dict(**make_config().foo), is_(equal_to(dict(value="value"))))
+    assert_that(make_config().foo, is_(equal_to(dict(value="value"))))
+    assert_that(make_config().foo.copy(), is_(equal_to(dict(value="value"))))
+    assert_that(list(make_config().foo.values()), is_(equal_to(["value"])))
+    assert_that(list(make_config().foo.items()), is_(equal_to([("value", "value")])))
+    assert_that(make_config(), is_(equal_to(make_config())))
+    assert_that(
+        json_dumps(make_config(), sort_keys=True),
+        is_(equal_to('{"bar": {"nested": "nested"}, "foo": {"value": "value"}}')),
+    )
+
+
+def test_deferred_copy_is_lazy():
+    """
+    Constructing and merging configurations does not resolve deferred values.
+
+    """
+    config = Configuration(Configuration(failing=Deferred(lambda: 1 / 0)))
+    config.merge(Configuration(other=Deferred(lambda: 1 / 0)))
+
+    assert_that(calling(dict).with_args(config), raises(ZeroDivisionError))
@@ -6,7 +6,10 @@ from hamcrest import (
     assert_that,
     calling,
     empty,
+    equal_to,
     has_entries,
+    has_length,
+    is_,
     raises,
 )
 
@@ -18,6 +21,7 @@ from microcosm.api import (
     typed,
 )
 from microcosm.config.api import configure
+from microcosm.config.model import Deferred
 from microcosm.config.types import boolean, comma_separated_list
 from microcosm.errors import ValidationError
 from microcosm.metadata import Metadata
@@ -326,3 +330,73 @@ class TestValidation:
             calling(required).with_args(list, default_value=["foo"], default_factory=list),
             raises(ValueError),
         )
+
+    @check_no_warnings()
+    def test_lazy(self):
+        calls = []
+
+        def default_factory():
+            calls.append(True)
+            return "1"
+
+        self.create_fixture(value=typed(int, default_factory=default_factory, lazy=True))
+        loader = load_from_dict()
+
+        config = configure(self.registry.defaults, self.metadata, loader)
+        assert_that(calls, is_(empty()))
+        assert_that(config.foo.value, is_(equal_to(1)))
+        assert_that(config.foo["value"], is_(equal_to(1)))
+        assert_that(calls, has_length(1))
+
+    @check_no_warnings()
+    def test_lazy_invalid(self):
+        self.create_fixture(value=required(int, lazy=True))
+        loader = load_from_dict(
+            foo=dict(
+                value="bar",
+            ),
+        )
+
+        config = configure(self.registry.defaults, self.metadata, loader)
+        assert_that(
+            calling(getattr).with_args(config.foo, "value"),
+            raises(ValidationError),
+        )
+
+    @check_no_warnings()
+    def test_lazy_strict(self):
+        self.create_fixture(value=required(int, lazy=True))
+        loader = load_from_dict(
+            foo=dict(
+                value="bar",
+            ),
+        )
+
+        assert_that(
+            calling(configure).with_args(self.registry.defaults, self.metadata, loader, strict=True),
+            raises(ValidationError),
+        )
+
+    @check_no_warnings()
+    def test_deferred_value(self):
+        calls = []
+
+        def decrypt():
+            calls.append(True)
+            return "1"
+
+        self.create_fixture(value=required(int))
+        loader = load_from_dict(
+            foo=dict(
+                value=Deferred(decrypt),
+            ),
+        )
+
+        config = configure(self.registry.defaults, self.metadata, loader)
+        assert_that(calls, is_(empty()))
+        assert_that(config.get_path("foo.value"), is_(equal_to(1)))
+        assert_that(config.foo.value, is_(equal_to(1)))
+        assert_that(calls, has_length(1))
+
+        strict_config = configure(self.registry.defaults, self.metadata, loader, strict=True)
+        assert_that(dict(strict_config.foo), is_(equal_to(dict(value=1))))
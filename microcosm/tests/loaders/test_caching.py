@@ -0,0 +1,166 @@
+"""
+Test loader caching.
+
+"""
+from os import listdir, stat
+from os.path import join
+from stat import S_IMODE
+from tempfile import TemporaryDirectory
+from warnings import catch_warnings, simplefilter
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_exactly,
+    contains_string,
+    equal_to,
+    has_length,
+    is_,
+    raises,
+)
+
+from microcosm.config.model import Configuration
+from microcosm.loaders.caching import CachingLoader, load_with_cache
+from microcosm.metadata import Metadata
+
+
+class Source:
+    """
+    A fake configuration source.
+
+    """
+    def __init__(self):
+        self.calls = 0
+        self.value = "initial"
+        self.version = 1
+        self.available = True
+
+    def __call__(self, metadata):
+        self.calls += 1
+        if not self.available:
+            raise IOError("unavailable")
+        return Configuration(foo=dict(value=self.value))
+
+    def get_version(self, metadata):
+        if not self.available:
+            raise IOError("unavailable")
+        return self.version
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCachingLoader:
+
+    def setup_method(self):
+        self.metadata = Metadata("test")
+        self.source = Source()
+        self.clock = Clock()
+
+    def test_cache_forever(self):
+        loader = load_with_cache(self.source)
+
+        assert_that(loader(self.metadata), is_(equal_to(dict(foo=dict(value="initial")))))
+        self.source.value = "changed"
+        assert_that(loader(self.metadata), is_(equal_to(dict(foo=dict(value="initial")))))
+        assert_that(self.source.calls, is_(equal_to(1)))
+
+        loader.invalidate()
+        assert_that(loader(self.metadata), is_(equal_to(dict(foo=dict(value="changed")))))
+
+    def test_output_is_isolated(self):
+        loader = load_with_cache(self.source)
+
+        loader(self.metadata).foo.value = "mutated"
+        assert_that(loader(self.metadata).foo.value, is_(equal_to("initial")))
+
+    def test_ttl(self):
+        loader = CachingLoader(self.source, ttl=10, clock=self.clock)
+
+        loader(self.metadata)
+        self.source.value = "changed"
+        self.clock.now = 5
+        assert_that(loader(self.metadata).foo.value, is_(equal_to("initial")))
+
+        self.clock.now = 15
+        assert_that(loader(self.metadata).foo.value, is_(equal_to("changed")))
+        assert_that(self.source.calls, is_(equal_to(2)))
+
+    def test_conditional_refresh(self):
+        loader = CachingLoader(self.source, ttl=10, version=self.source.get_version, clock=self.clock)
+
+        loader(self.metadata)
+        self.clock.now = 15
+        # version is unchanged; the loader is not called
+        assert_that(loader(self.metadata).foo.value, is_(equal_to("initial")))
+        assert_that(self.source.calls, is_(equal_to(1)))
+
+        self.source.value = "changed"
+        self.source.version = 2
+        self.clock.now = 30
+        assert_that(loader(self.metadata).foo.value, is_(equal_to("changed")))
+        assert_that(self.source.calls, is_(equal_to(2)))
+
+    def test_fallback_to_memory(self):
+        loader = CachingLoader(self.source, ttl=10, clock=self.clock)
+
+        loader(self.metadata)
+        self.source.available = False
+        self.clock.now = 15
+        with catch_warnings(record=True) as caught_warnings:
+            simplefilter("always")
+            assert_that(loader(self.metadata).foo.value, is_(equal_to("initial")))
+
+        # the failure (and the age of the fallback) is reported
+        assert_that(caught_warnings, has_length(1))
+        assert_that(str(caught_warnings[0].message), contains_string("OSError('unavailable')"))
+        assert_that(str(caught_warnings[0].message), contains_string("s ago"))
+
+    def test_fallback_to_disk(self):
+        with TemporaryDirectory() as dirname:
+            path = join(dirname, "config.json")
+
+            load_with_cache(self.source, path=path)(self.metadata)
+
+            self.source.available = False
+            loader = load_with_cache(self.source, path=path)
+            with catch_warnings(record=True) as caught_warnings:
+                simplefilter("always")
+                assert_that(loader(self.metadata), is_(equal_to(dict(foo=dict(value="initial")))))
+
+            assert_that(caught_warnings, has_length(1))
+            assert_that(str(caught_warnings[0].message), contains_string("unavailable"))
+
+    def test_cache_per_metadata(self):
+        loader = load_with_cache(lambda metadata: Configuration(name=metadata.name, testing=metadata.testing))
+
+        assert_that(loader(Metadata("foo")), is_(equal_to(dict(name="foo", testing=False))))
+        assert_that(loader(Metadata("bar")), is_(equal_to(dict(name="bar", testing=False))))
+        assert_that(loader(Metadata("foo", testing=True)), is_(equal_to(dict(name="foo", testing=True))))
+        assert_that(loader.entries, has_length(3))
+
+    def test_disk_cache_per_metadata(self):
+        with TemporaryDirectory() as dirname:
+            path = join(dirname, "config.json")
+
+            load_with_cache(self.source, path=path)(self.metadata)
+
+            self.source.available = False
+            loader = load_with_cache(self.source, path=path)
+            assert_that(calling(loader).with_args(Metadata("other")), raises(IOError))
+
+            # only the (private) cache file remains
+            assert_that(listdir(dirname), contains_exactly("config.json"))
+            assert_that(S_IMODE(stat(path).st_mode), is_(equal_to(0o600)))
+
+    def test_no_fallback(self):
+        self.source.available = False
+        loader = load_with_cache(self.source)
+
+        assert_that(calling(loader).with_args(self.metadata), raises(IOError))
@@ -2,9 +2,22 @@
 Test loading function composition.
 
 """
+from asyncio import sleep as async_sleep
 from json import dumps
-
-from hamcrest import assert_that, equal_to, is_
+from subprocess import run
+from sys import executable
+from textwrap import dedent
+from time import monotonic, sleep
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_exactly,
+    equal_to,
+    is_,
+    less_than,
+    raises,
+)
 
 from microcosm.config.model import Configuration
 from microcosm.loaders import empty_loader, load_from_dict
@@ -39,6 +52,104 @@ def test_load_each():
     })))
 
 
+def sleeping_loader(seconds, **kwargs):
+    def load_after_sleep(metadata):
+        sleep(seconds)
+        return Configuration(kwargs)
+    return load_after_sleep
+
+
+async def async_loader(metadata):
+    await async_sleep(0.01)
+    return Configuration(foo="async")
+
+
+def test_load_each_concurrent():
+    """
+    Concurrent loaders run in parallel and merge in order.
+
+    """
+    metadata = Metadata("foo")
+    loader = load_each(
+        sleeping_loader(0.2, foo="first", bar="first"),
+        sleeping_loader(0.2, foo="second"),
+        async_loader,
+        sleeping_loader(0.0, baz="last"),
+        concurrent=True,
+    )
+
+    started_at = monotonic()
+    config = loader(metadata)
+
+    assert_that(monotonic() - started_at, is_(less_than(0.4)))
+    assert_that(config, is_(equal_to(dict(
+        foo="async",
+        bar="first",
+        baz="last",
+    ))))
+    assert_that(
+        [name for name, _ in loader.timings],
+        contains_exactly("load_after_sleep", "load_after_sleep", "async_loader", "load_after_sleep"),
+    )
+
+
+def test_load_each_concurrent_timeout():
+    """
+    Concurrent loaders that are too slow raise an error.
+
+    """
+    metadata = Metadata("foo")
+    loader = load_each(
+        sleeping_loader(0.0, foo="fast"),
+        sleeping_loader(0.5, foo="slow"),
+        concurrent=True,
+        timeout=0.1,
+    )
+
+    assert_that(calling(loader).with_args(metadata), raises(TimeoutError))
+
+
+def test_load_each_concurrent_timeout_per_loader():
+    """
+    Time spent waiting for a worker does not count towards a loader's timeout.
+
+    """
+    metadata = Metadata("foo")
+    loader = load_each(
+        sleeping_loader(0.15, foo="first"),
+        sleeping_loader(0.15, bar="second"),
+        concurrent=True,
+        timeout=0.25,
+        max_workers=1,
+    )
+
+    assert_that(loader(metadata), is_(equal_to(dict(foo="first", bar="second"))))
+
+
+def test_load_each_concurrent_timeout_does_not_block_exit():
+    """
+    Loaders that time out do not prevent the process from exiting.
+
+    """
+    script = dedent("""
+        from time import sleep
+        from microcosm.loaders.compose import load_each
+        from microcosm.metadata import Metadata
+
+        def hang(metadata):
+            sleep(30)
+
+        try:
+            load_each(hang, concurrent=True, timeout=0.1)(Metadata("foo"))
+        except TimeoutError:
+            pass
+    """)
+
+    started_at = monotonic()
+    run([executable, "-c", script], check=True, timeout=20)
+    assert_that(monotonic() - started_at, is_(less_than(10)))
+
+
 def secondary_loader(metadata, config):
     return Configuration({
         config.foo: "bazman",
@@ -170,6 +281,96 @@ def test_load_partitioned():
     ))))
 
 
+def test_load_partitioned_last_writer():
+    """
+    Values written by several partitions are attributed to the last writer only.
+
+    """
+    metadata = Metadata("foo")
+    loader = load_partitioned(
+        foo=load_from_dict(
+            same=dict(
+                value="same",
+            ),
+            replaced="foo",
+            nested=dict(
+                value="foo",
+            ),
+        ),
+        bar=load_from_dict(
+            same=dict(
+                value="same",
+            ),
+            replaced=dict(
+                value="bar",
+            ),
+            nested="bar",
+        ),
+    )
+    config = loader(metadata)
+
+    assert_that(config, is_(equal_to(dict(
+        same=dict(
+            value="same",
+        ),
+        replaced=dict(
+            value="bar",
+        ),
+        nested="bar",
+    ))))
+    assert_that(loader.foo, is_(equal_to(None)))
+    assert_that(loader.bar, is_(equal_to(config)))
+    assert_that(loader.provenance, is_(equal_to({
+        ("same", "value"): "bar",
+        ("replaced", "value"): "bar",
+        ("nested", ): "bar",
+    })))
+
+
+def test_load_partitioned_lists():
+    """
+    Lists that several partitions append to are attributed element by element.
+
+    """
+    metadata = Metadata("foo")
+    loader = load_partitioned(
+        foo=load_from_dict(
+            foo=dict(
+                appended=[1],
+                replaced=[1],
+            ),
+        ),
+        bar=load_from_dict(
+            foo=dict(
+                appended=[2],
+                replaced="bar",
+            ),
+        ),
+    )
+    config = loader(metadata)
+
+    assert_that(config, is_(equal_to(dict(
+        foo=dict(
+            appended=[1, 2],
+            replaced="bar",
+        ),
+    ))))
+    assert_that(loader.foo, is_(equal_to(dict(
+        foo=dict(
+            appended=[1],
+        ),
+    ))))
+    assert_that(loader.bar, is_(equal_to(dict(
+        foo=dict(
+            appended=[2],
+            replaced="bar",
+        ),
+    ))))
+    assert_that(loader.provenance, is_(equal_to({
+        ("foo", "replaced"): "bar",
+    })))
+
+
 def test_load_config_and_secrets():
     metadata = Metadata("foo")
     loader = load_config_and_secrets(
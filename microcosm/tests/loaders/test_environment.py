@@ -1,6 +1,15 @@
-from hamcrest import assert_that, equal_to, is_
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_entries,
+    has_key,
+    is_,
+    is_not,
+    same_instance,
+)
 
 from microcosm.loaders import load_from_environ, load_from_environ_as_json
+from microcosm.loaders.environment import get_environ_snapshot
 from microcosm.metadata import Metadata
 from microcosm.tests.loaders.fixtures import envvar
 
@@ -56,3 +65,21 @@ def test_load_from_environ_multipart_name():
     with envvar("FOO_BAR__BAZ", "blah"):
         config = load_from_environ(metadata)
     assert_that(config, is_(equal_to({"baz": "blah"})))
+
+
+def test_environ_snapshot():
+    """
+    Environment snapshots are indexed by prefix and retaken when the environment changes.
+
+    """
+    with envvar("FOO__BAR", "baz"):
+        snapshot = get_environ_snapshot()
+        assert_that(get_environ_snapshot(), is_(same_instance(snapshot)))
+        assert_that(snapshot.for_prefix("FOO"), has_entries({"FOO__BAR": "baz"}))
+
+        with envvar("FOO__BAZ", "bar"):
+            assert_that(get_environ_snapshot(), is_not(same_instance(snapshot)))
+            assert_that(get_environ_snapshot().for_prefix("FOO"), has_entries({"FOO__BAZ": "bar"}))
+            assert_that(load_from_environ(Metadata("foo")), has_entries(bar="baz", baz="bar"))
+
+    assert_that(get_environ_snapshot().for_prefix("FOO"), is_not(has_key("FOO__BAZ")))
@@ -1,4 +1,12 @@
-from hamcrest import assert_that, equal_to, is_
+from random import Random
+
+from hamcrest import (
+    assert_that,
+    calling,
+    equal_to,
+    is_,
+    raises,
+)
 
 from microcosm.loaders.keys import expand_config
 
@@ -28,3 +36,73 @@ def test_expand_config():
             },
         )),
     )
+
+
+def expand_config_reference(
+    dct,
+    separator='.',
+    skip_to=0,
+    key_func=lambda key: key.lower(),
+    key_parts_filter=lambda key_parts: True,
+    value_func=lambda value: value
+):
+    """
+    Straightforward implementation of `expand_config` (for comparison).
+
+    """
+    config = {}
+
+    for key, value in dct.items():
+        key_separator = separator(key) if callable(separator) else separator
+        key_parts = key.split(key_separator)
+        if not key_parts_filter(key_parts):
+            continue
+        key_config = config
+        for key_part in key_parts[skip_to:-1]:
+            key_config = key_config.setdefault(key_func(key_part), dict())
+        key_config[key_func(key_parts[-1])] = value_func(value)
+
+    return config
+
+
+def test_expand_config_bulk():
+    """
+    Bulk configuration expansion should match the straightforward implementation.
+
+    """
+    random = Random(42)
+    dct = {
+        ".".join([
+            random.choice(["prefix", "Prefix", "other"]),
+            *(random.choice(["a", "B", "c", "d"]) for _ in range(random.randint(0, 3))),
+            f"key{value}",
+        ]): str(value)
+        for value in range(2000)
+    }
+    # replace intermediate dictionaries with values
+    dct.update({
+        "prefix.a": "replaced",
+        "other": "replaced",
+        "Prefix.c.d.key": "added",
+    })
+
+    for kwargs in (
+        dict(),
+        dict(skip_to=1),
+        dict(key_func=lambda key: key.upper()),
+        dict(key_parts_filter=lambda key_parts: key_parts[0] == "prefix", skip_to=1),
+        dict(value_func=lambda value: int(value) if value.isdigit() else value),
+        dict(separator=lambda key: "." if key.startswith("prefix") else "|"),
+    ):
+        assert_that(expand_config(dict(dct), **kwargs), is_(equal_to(expand_config_reference(dict(dct), **kwargs))))
+
+
+def test_expand_config_replaced_dictionary():
+    """
+    Keys below a dictionary that was replaced by a value cannot be expanded.
+
+    """
+    assert_that(
+        calling(expand_config).with_args({"a.b": "1", "a": "2", "a.c": "3"}),
+        raises(TypeError),
+    )
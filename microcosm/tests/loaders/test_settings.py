@@ -0,0 +1,119 @@
+"""
+Test settings file loading.
+
+"""
+from json import dumps, loads
+from os import (
+    chmod,
+    listdir,
+    remove,
+    stat,
+    utime,
+)
+from os.path import basename, exists
+from stat import S_IMODE
+from tempfile import TemporaryDirectory
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_exactly,
+    equal_to,
+    is_,
+    raises,
+)
+
+from microcosm.loaders.settings import (
+    get_cache_filename,
+    load_from_cached_file,
+    load_from_cached_json_file,
+    load_from_json_file,
+)
+from microcosm.metadata import Metadata
+from microcosm.tests.loaders.fixtures import envvar, settings
+
+
+def test_load_from_json_file():
+    metadata = Metadata("foo")
+    with settings(dumps(dict(foo="bar"))) as settings_:
+        with envvar("FOO__SETTINGS", settings_.name):
+            config = load_from_json_file(metadata)
+
+    assert_that(config, is_(equal_to(dict(foo="bar"))))
+
+
+def test_load_from_cached_json_file():
+    """
+    The compiled cache is written on first load and used while the file is unchanged.
+
+    """
+    metadata = Metadata("foo")
+    with TemporaryDirectory() as cache_dir:
+        loader = load_from_cached_file(lambda data: {"parsed": data}, cache_dir=cache_dir, cache_name="raw")
+        with settings(dumps(dict(foo="bar"))) as settings_:
+            with envvar("FOO__SETTINGS", settings_.name):
+                assert_that(load_from_cached_json_file(metadata), is_(equal_to(dict(foo="bar"))))
+                assert_that(exists(get_cache_filename(settings_.name)), is_(equal_to(True)))
+
+                # the cache is used while the file's size and mtime are unchanged
+                mtime_ns = stat(settings_.name).st_mtime_ns
+                settings_.seek(0)
+                settings_.write(dumps(dict(foo="baz")))
+                settings_.flush()
+                utime(settings_.name, ns=(mtime_ns, mtime_ns))
+                assert_that(load_from_cached_json_file(metadata), is_(equal_to(dict(foo="bar"))))
+
+                # the cache is invalidated when the file changes
+                utime(settings_.name, ns=(0, 0))
+                assert_that(load_from_cached_json_file(metadata), is_(equal_to(dict(foo="baz"))))
+
+                # other formats use their own cache
+                assert_that(loader(metadata), is_(equal_to(dict(parsed=dumps(dict(foo="baz"))))))
+                assert_that(exists(get_cache_filename(settings_.name, cache_dir, "raw")), is_(equal_to(True)))
+
+                remove(get_cache_filename(settings_.name))
+
+
+def test_load_from_cached_file_permissions():
+    """
+    The compiled cache is only readable by its owner.
+
+    """
+    metadata = Metadata("foo")
+    with TemporaryDirectory() as cache_dir:
+        loader = load_from_cached_file(loads, cache_dir=cache_dir, cache_name="secret")
+        with settings(dumps(dict(password="secret"))) as settings_:
+            chmod(settings_.name, 0o600)
+            with envvar("FOO__SETTINGS", settings_.name):
+                assert_that(loader(metadata), is_(equal_to(dict(password="secret"))))
+
+            cache_filename = get_cache_filename(settings_.name, cache_dir, "secret")
+            assert_that(S_IMODE(stat(cache_filename).st_mode), is_(equal_to(0o600)))
+            # no temporary files are left behind
+            assert_that(listdir(cache_dir), contains_exactly(basename(cache_filename)))
+
+
+def test_load_from_cached_file_names():
+    """
+    Load functions that cannot be told apart require an explicit cache name.
+
+    """
+    assert_that(
+        calling(load_from_cached_file).with_args(lambda data: {"parsed": data}),
+        raises(ValueError),
+    )
+
+    metadata = Metadata("foo")
+    first = load_from_cached_file(lambda data: {"first": data}, cache_name="first")
+    second = load_from_cached_file(lambda data: {"second": data}, cache_name="second")
+    with settings("{}") as settings_:
+        with envvar("FOO__SETTINGS", settings_.name):
+            assert_that(first(metadata), is_(equal_to(dict(first="{}"))))
+            assert_that(second(metadata), is_(equal_to(dict(second="{}"))))
+            remove(get_cache_filename(settings_.name, cache_name="first"))
+            remove(get_cache_filename(settings_.name, cache_name="second"))
+
+
+def test_load_from_cached_json_file_missing():
+    metadata = Metadata("missing")
+    assert_that(load_from_cached_json_file(metadata), is_(equal_to(dict())))
@@ -0,0 +1,86 @@
+"""
+Boot manifest tests.
+
+"""
+from os.path import exists, join
+from sys import modules
+from tempfile import TemporaryDirectory
+
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    has_item,
+    has_items,
+    is_,
+    none,
+)
+
+from microcosm.manifest import BootManifest
+from microcosm.object_graph import create_object_graph
+from microcosm.profile import ResolutionProfiler
+from microcosm.registry import Registry
+
+
+def create_registry():
+    registry = Registry()
+    registry.bind("child", lambda graph: "child")
+    registry.bind("parent", lambda graph: ("parent", graph.child))
+    return registry
+
+
+def test_resolution_profiler():
+    profiler = ResolutionProfiler()
+    graph = create_object_graph("test", registry=create_registry(), profiler=profiler)
+    graph.use("parent")
+
+    assert_that(profiler.order, contains_exactly("parent", "child"))
+    assert_that(profiler.self_times["child"], is_(profiler.times["child"]))
+    assert_that(
+        profiler.self_times["parent"] <= profiler.times["parent"] - profiler.times["child"] + 1e-9,
+        is_(True),
+    )
+
+
+def test_read_missing():
+    with TemporaryDirectory() as dirname:
+        assert_that(BootManifest.read(join(dirname, "manifest.json")), is_(none()))
+
+
+def test_write_and_read():
+    manifest = BootManifest(keys=["foo"], modules=["json"], timings=dict(foo=0.5))
+
+    with TemporaryDirectory() as dirname:
+        path = join(dirname, "manifest.json")
+        manifest.write(path)
+        loaded = BootManifest.read(path)
+
+    assert_that(loaded.keys, contains_exactly("foo"))
+    assert_that(loaded.modules, contains_exactly("json"))
+    assert_that(loaded.timings, is_(dict(foo=0.5)))
+
+
+def test_prefetch():
+    modules.pop("colorsys", None)
+    manifest = BootManifest(modules=["colorsys", "microcosm.does_not_exist"])
+
+    manifest.prefetch().join()
+
+    assert_that(modules, has_item("colorsys"))
+
+
+def test_graph_writes_manifest_on_lock():
+    with TemporaryDirectory() as dirname:
+        path = join(dirname, "manifest.json")
+        graph = create_object_graph("test", registry=create_registry(), boot_manifest=path)
+        graph.use("parent")
+        assert_that(exists(path), is_(False))
+
+        graph.lock()
+        manifest = BootManifest.read(path)
+
+        # the next boot reads (and prefetches) the manifest
+        create_object_graph("test", registry=create_registry(), boot_manifest=path)
+
+    assert_that(manifest.keys, contains_exactly("parent", "child"))
+    assert_that(manifest.modules, has_items(__name__))
+    assert_that(manifest.timings, has_items("parent", "child"))
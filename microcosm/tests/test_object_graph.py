@@ -2,22 +2,33 @@
 Object Graph Tests
 
 """
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Barrier, Event, Thread
 from unittest.mock import Mock
 
 from hamcrest import (
     assert_that,
     calling,
     contains_exactly,
+    empty,
     equal_to,
+    has_entries,
     has_items,
+    has_length,
     instance_of,
     is_,
+    none,
     raises,
 )
 
-from microcosm.api import get_component_name
-from microcosm.decorators import binding, defaults
-from microcosm.errors import CyclicGraphError, LockedGraphError
+from microcosm.api import get_component_name, load_from_dict, required
+from microcosm.decorators import binding, defaults, depends_on
+from microcosm.errors import (
+    CyclicGraphError,
+    LockedGraphError,
+    NotBoundError,
+    ValidationError,
+)
 from microcosm.object_graph import create_object_graph
 from microcosm.registry import Registry
 
@@ -179,3 +190,229 @@ def test_default_object_graph_description():
         name="test",
     )
     assert_that(graph.metadata.description, is_(equal_to("")))
+
+
+def test_object_graph_lazy_validation():
+    """
+    Configuration may be validated per component, on first resolution.
+
+    """
+    registry = Registry()
+
+    @binding("valid", registry=registry)
+    @defaults(value=required(int))
+    def create_valid(graph):
+        return graph.config.valid.value
+
+    @binding("invalid", registry=registry)
+    @defaults(value=required(int))
+    def create_invalid(graph):
+        return graph.config.invalid.value
+
+    loader = load_from_dict(valid=dict(value="1"))
+    assert_that(
+        calling(create_object_graph).with_args("test", registry=registry, loader=loader),
+        raises(ValidationError),
+    )
+
+    graph = create_object_graph("test", registry=registry, loader=loader, lazy_validation=True)
+    assert_that(graph.valid, is_(equal_to(1)))
+    assert_that(calling(graph.use).with_args("invalid"), raises(ValidationError))
+    assert_that(calling(graph.validate_all), raises(ValidationError))
+
+
+def test_object_graph_dependencies():
+    """
+    Resolved components record the keys that their factories accessed.
+
+    """
+    graph = create_object_graph(
+        name="test",
+    )
+    graph.use("parent", "hello_world")
+
+    assert_that(graph.get_dependencies(), is_(equal_to(dict(
+        parent=["child"],
+        child=[],
+        hello_world=[],
+    ))))
+
+
+def test_object_graph_components():
+    """
+    Graphs may be restricted to a closure of components.
+
+    """
+    registry = Registry()
+
+    @binding("first", registry=registry)
+    @defaults(value=required(int))
+    def create_first(graph):
+        return graph.second + graph.config.first.value
+
+    @binding("second", registry=registry)
+    @depends_on("third")
+    def create_second(graph):
+        return graph.third
+
+    @binding("third", registry=registry)
+    def create_third(graph):
+        return 3
+
+    @binding("unrelated", registry=registry)
+    @defaults(value=required(int))
+    def create_unrelated(graph):
+        return graph.config.unrelated.value
+
+    graph = create_object_graph(
+        "test",
+        registry=registry,
+        loader=load_from_dict(first=dict(value="1")),
+        components=["first"],
+        dependencies=dict(first=["second"]),
+    )
+
+    assert_that(graph.first, is_(equal_to(4)))
+    assert_that(graph._registry.defaults, is_(equal_to(dict(
+        first=dict(value=registry.defaults["first"]["value"]),
+        second=dict(),
+        third=dict(),
+    ))))
+    assert_that(calling(graph.use).with_args("unrelated"), raises(NotBoundError))
+    assert_that(calling(graph.use).with_args("hello_world"), raises(NotBoundError))
+
+
+def test_concurrent_resolution():
+    """
+    Threads that access a component being resolved by another thread wait for it.
+
+    """
+    started, release = Event(), Event()
+    calls = []
+
+    def create_slow(graph):
+        calls.append("slow")
+        started.set()
+        release.wait(5)
+        return object()
+
+    registry = Registry()
+    registry.bind("slow", create_slow)
+    registry.bind("parent", lambda graph: graph.slow)
+    graph = create_object_graph("test", registry=registry)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(getattr, graph, "parent")
+        started.wait(5)
+        second = executor.submit(getattr, graph, "slow")
+        release.set()
+
+        assert_that(first.result(), is_(second.result()))
+
+    assert_that(calls, contains_exactly("slow"))
+    assert_that(graph.get_dependencies(), is_(equal_to(dict(parent=["slow"], slow=[]))))
+
+
+def test_resolution_from_factory_threads():
+    """
+    Factories can resolve (other) components from worker threads.
+
+    """
+    def create_parent(graph):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return list(executor.map(lambda key: getattr(graph, key), ["first", "second"]))
+
+    registry = Registry()
+    registry.bind("first", lambda graph: "first")
+    registry.bind("second", lambda graph: graph.first)
+    registry.bind("parent", create_parent)
+    graph = create_object_graph("test", registry=registry)
+
+    results = []
+    thread = Thread(target=lambda: results.append(graph.parent), daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert_that(thread.is_alive(), is_(equal_to(False)))
+    assert_that(results, contains_exactly(["first", "first"]))
+    assert_that(graph.get_dependencies(), has_entries(second=["first"]))
+
+
+def test_cycle_through_factory_threads():
+    """
+    Cycles that cross threads raise instead of waiting forever.
+
+    """
+    def create_first(graph):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(lambda: graph.second).result()
+
+    registry = Registry()
+    registry.bind("first", create_first)
+    registry.bind("second", lambda graph: graph.first)
+    graph = create_object_graph("test", registry=registry, resolution_timeout=0.2)
+
+    errors = []
+
+    def resolve():
+        try:
+            graph.first
+        except CyclicGraphError as error:
+            errors.append(error)
+
+    thread = Thread(target=resolve, daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert_that(thread.is_alive(), is_(equal_to(False)))
+    assert_that(errors, has_length(1))
+    assert_that(graph.get("first"), is_(none()))
+
+
+def test_cycle_between_waiting_threads():
+    """
+    Threads that wait for each other's components raise without waiting for a timeout.
+
+    """
+    started = Barrier(2, timeout=5)
+    entered = set()
+
+    def create(key, other):
+        def factory(graph):
+            # reserve both components before either one accesses the other
+            if key not in entered:
+                entered.add(key)
+                started.wait()
+            return getattr(graph, other)
+        return factory
+
+    registry = Registry()
+    registry.bind("first", create("first", "second"))
+    registry.bind("second", create("second", "first"))
+    graph = create_object_graph("test", registry=registry, resolution_timeout=None)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(getattr, graph, key) for key in ("first", "second")]
+        done, not_done = wait(futures, timeout=5)
+
+    assert_that(not_done, is_(empty()))
+    assert_that(
+        [future.exception() for future in futures],
+        contains_exactly(instance_of(CyclicGraphError), instance_of(CyclicGraphError)),
+    )
+
+
+def test_cycle_through_shared_cache():
+    """
+    Graphs that share a cache share reservations (and hence cycle detection).
+
+    """
+    registry = Registry()
+    registry.bind(
+        "shared_cycle",
+        lambda graph: create_object_graph("test", registry=registry, cache="process").shared_cycle,
+    )
+    graph = create_object_graph("test", registry=registry, cache="process")
+
+    assert_that(calling(graph.use).with_args("shared_cycle"), raises(CyclicGraphError))
+    assert_that(graph.get("shared_cycle"), is_(none()))
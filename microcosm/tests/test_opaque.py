@@ -2,15 +2,27 @@
 Opaque context tests.
 
 """
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
 from hamcrest import (
     assert_that,
+    calling,
     equal_to,
     has_entries,
+    instance_of,
     is_,
+    raises,
 )
 
 from microcosm.api import binding, create_object_graph, load_from_dict
-from microcosm.opaque import NormalizedDict, Opaque
+from microcosm.config.model import Deferred
+from microcosm.opaque import (
+    MAX_CASEFOLDED_KEYS,
+    NormalizedDict,
+    Opaque,
+    _casefolded_keys,
+)
 
 
 THIS = "this"
@@ -98,12 +110,34 @@ def test_normalized_dict_update():
     assert dct == {"foo": "Baz", "bar": "Foo"}
 
 
+def test_normalized_dict_update_variants():
+    dct = NormalizedDict()
+    dct.update([("FOO", "Baz")], Bar="Foo")
+    dct.update(NormalizedDict(Baz="Qux"))
+    assert dct == {"foo": "Baz", "bar": "Foo", "baz": "Qux"}
+    assert_that(calling(dct.update).with_args({}, {}), raises(TypeError))
+
+
 def test_normalized_dict_setdefault():
     dct = NormalizedDict()
-    dct.setdefault("Foo", "bar")
+    assert dct.setdefault("Foo", "bar") == "bar"
+    assert dct.setdefault("FOO", "baz") == "bar"
     assert dct["foo"] == "bar"
 
 
+def test_normalized_dict_casefold():
+    dct = NormalizedDict({"Straße": "foo", "ß": "bar", 1: "baz"})
+    assert dct == {"strasse": "foo", "ss": "bar", 1: "baz"}
+    assert dct["STRASSE"] == "foo"
+
+
+def test_normalized_dict_key_cache_is_bounded():
+    for index in range(MAX_CASEFOLDED_KEYS * 2):
+        NormalizedDict({f"X-Header-{index}": index})
+
+    assert len(_casefolded_keys) <= MAX_CASEFOLDED_KEYS
+
+
 def test_dict_usage():
     """
     Opaque should be dict-like.
@@ -174,6 +208,265 @@ def test_composition():
     assert_that(opaque.as_dict(), is_(equal_to({THIS: VALUE})))
 
 
+def test_isolation():
+    """
+    Opaque.initialize should not share mutable values between contexts.
+
+    """
+    opaque = Opaque()
+    opaque[THIS] = [VALUE]
+
+    with opaque.initialize(example_func, OTHER, OTHER):
+        assert_that(opaque.as_dict(), is_(instance_of(NormalizedDict)))
+        opaque["Other"] = ALSO
+        assert_that(opaque[THIS], is_(equal_to(OTHER)))
+
+    with opaque.initialize(dict):
+        opaque[THIS].append(OTHER)
+        assert_that(opaque[THIS], is_(equal_to([VALUE, OTHER])))
+        assert_that(opaque.get("OTHER"), is_(equal_to(None)))
+
+    assert_that(opaque.as_dict(), is_(equal_to({THIS: [VALUE]})))
+
+
+def test_deferred_values():
+    """
+    Deferred opaque values should be computed once, on first read.
+
+    """
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    opaque = Opaque()
+
+    with opaque.initialize(lambda: {THIS: Deferred(compute, VALUE), THAT: Deferred(compute, OTHER)}):
+        assert_that(calls, is_(equal_to([])))
+        # membership does not compute values
+        assert_that(THIS in opaque, is_(equal_to(True)))
+        assert_that("missing" in opaque, is_(equal_to(False)))
+        assert_that(calls, is_(equal_to([])))
+        assert_that(opaque[THIS], is_(equal_to(VALUE)))
+        assert_that(opaque.get("THIS"), is_(equal_to(VALUE)))
+        assert_that(calls, is_(equal_to([VALUE])))
+
+        with opaque.initialize(dict):
+            assert_that(opaque.as_dict(), is_(equal_to({THIS: VALUE, THAT: OTHER})))
+
+        # values computed within a nested context are not computed again
+        assert_that(opaque.as_dict(), is_(equal_to({THIS: VALUE, THAT: OTHER})))
+
+    assert_that(calls, is_(equal_to([VALUE, OTHER])))
+
+
+def test_bounds():
+    """
+    Opaque.initialize should drop keys that are not allowed or too large.
+
+    """
+    opaque = Opaque(
+        allowed_keys=["This", "That", "Other"],
+        max_value_bytes=4,
+        max_total_bytes=11,
+    )
+
+    def bounded_func():
+        return {
+            "This": "foo",
+            "blob": "x",
+            "That": "föö",
+            "Other": "quux",
+        }
+
+    with opaque.initialize(bounded_func):
+        # "that" is 3 characters but 5 bytes; "other" exceeds the total budget
+        assert_that(opaque.as_dict(), is_(equal_to({THIS: VALUE})))
+
+    assert_that(opaque.dropped, is_(equal_to(dict(
+        not_allowed=1,
+        value_too_large=1,
+        total_too_large=1,
+    ))))
+
+
+def test_bounds_after_initialize():
+    """
+    Writes and deferred values should be bounded when they happen.
+
+    """
+    opaque = Opaque(
+        allowed_keys=["This", "That", "Other"],
+        max_value_bytes=4,
+        max_total_bytes=11,
+    )
+
+    def deferred_func():
+        return {
+            "This": Deferred(lambda: "föö"),
+            "That": Deferred(lambda: "quux"),
+        }
+
+    with opaque.initialize(deferred_func):
+        # "this" is 5 bytes when computed
+        assert_that(opaque.get(THIS), is_(equal_to(None)))
+        assert_that(THIS in opaque, is_(equal_to(False)))
+        assert_that(opaque[THAT], is_(equal_to("quux")))
+
+        opaque["Blob"] = "x"
+        opaque[THIS] = "xxxxx"
+        opaque[THIS] = "xxx"
+        opaque["Other"] = "x"
+        assert_that(opaque.as_dict(), is_(equal_to({THAT: "quux"})))
+
+        # replacing a value frees its size
+        opaque[THAT] = "xx"
+        opaque[THIS] = "x"
+        assert_that(opaque.as_dict(), is_(equal_to({THAT: "xx", THIS: "x"})))
+
+    assert_that(opaque.dropped, is_(equal_to(dict(
+        not_allowed=1,
+        value_too_large=2,
+        total_too_large=2,
+    ))))
+
+
+def test_configure_bounds():
+    graph = create_object_graph(
+        "test",
+        testing=True,
+        loader=load_from_dict(
+            opaque=dict(
+                allowed_keys="this,that",
+                max_value_bytes="3",
+                this=VALUE,
+            ),
+        ),
+    )
+
+    assert_that(graph.opaque.as_dict(), is_(equal_to({THIS: VALUE})))
+    assert_that(graph.opaque.allowed_keys, is_(equal_to({THIS, THAT})))
+
+    with graph.opaque.initialize(example_func, ALSO, "quux"):
+        assert_that(graph.opaque.as_dict(), is_(equal_to({THIS: ALSO})))
+
+
+def test_encoding():
+    """
+    Opaque should encode (and cache the encoded forms of) its data.
+
+    """
+    opaque = Opaque()
+
+    with opaque.initialize(example_func, VALUE, 1):
+        headers = opaque.as_headers()
+        assert_that(headers, is_(equal_to({THIS: VALUE, THAT: "1"})))
+        assert_that(opaque.as_message_attributes(), is_(equal_to({
+            THIS: dict(DataType="String", StringValue=VALUE),
+            THAT: dict(DataType="String", StringValue="1"),
+        })))
+        assert_that(opaque.as_json(), is_(equal_to('{"this": "foo", "that": 1}')))
+
+        # encoded forms are cached (but not shared with callers)
+        headers[ALSO] = ALSO
+        assert_that(opaque.as_dict()._encoded, has_entries(headers={THIS: VALUE, THAT: "1"}))
+        assert_that(opaque.as_headers(), is_(equal_to({THIS: VALUE, THAT: "1"})))
+
+        # writes invalidate the cache
+        opaque["That"] = OTHER
+        assert_that(opaque.as_headers(), is_(equal_to({THIS: VALUE, THAT: OTHER})))
+
+        with opaque.initialize(dict, Other=ALSO):
+            assert_that(opaque.as_json(), is_(equal_to('{"this": "foo", "that": "bar", "other": "baz"}')))
+
+        assert_that(opaque.as_json(), is_(equal_to('{"this": "foo", "that": "bar"}')))
+
+
+def test_decoding():
+    opaque = Opaque(allowed_keys=[THIS, THAT])
+
+    assert_that(opaque.from_headers({"This": VALUE, "Host": OTHER}), is_(equal_to({THIS: VALUE})))
+    assert_that(
+        opaque.from_message_attributes({
+            "This": dict(DataType="String", StringValue=VALUE),
+            "That": dict(DataType="Binary", BinaryValue=b"bar"),
+        }),
+        is_(equal_to({THIS: VALUE})),
+    )
+    assert_that(opaque.from_json('{"This": "foo", "That": 1}'), is_(equal_to({THIS: VALUE, THAT: 1})))
+
+    with opaque.initialize(opaque.from_headers, {"This": VALUE}):
+        assert_that(opaque.as_dict(), is_(equal_to({THIS: VALUE})))
+
+
+def test_decoding_requires_allowlist():
+    opaque = Opaque()
+
+    assert_that(calling(opaque.from_headers).with_args({"Authorization": VALUE}), raises(ValueError))
+    assert_that(
+        calling(opaque.from_message_attributes).with_args({"This": dict(DataType="String", StringValue=VALUE)}),
+        raises(ValueError),
+    )
+    assert_that(opaque.from_json('{"This": "foo"}'), is_(equal_to({THIS: VALUE})))
+
+
+EXECUTOR_OPAQUE = Opaque(name="executor-test")
+
+
+def read_opaque(key):
+    value = EXECUTOR_OPAQUE.get(key)
+    # writes should not leak between tasks
+    EXECUTOR_OPAQUE[key] = ALSO
+    return value
+
+
+def test_thread_executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with EXECUTOR_OPAQUE.initialize(example_func, VALUE, OTHER):
+            future = EXECUTOR_OPAQUE.submit(executor, read_opaque, THIS)
+            results = list(EXECUTOR_OPAQUE.map(executor, read_opaque, [THIS, THAT, THIS]))
+            assert_that(EXECUTOR_OPAQUE.as_dict(), is_(equal_to(example_func(VALUE, OTHER))))
+
+    assert_that(future.result(), is_(equal_to(VALUE)))
+    assert_that(results, is_(equal_to([VALUE, OTHER, VALUE])))
+
+
+def test_process_executor():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        with EXECUTOR_OPAQUE.initialize(example_func, VALUE, OTHER):
+            future = EXECUTOR_OPAQUE.submit(executor, read_opaque, THIS)
+            results = list(EXECUTOR_OPAQUE.map(executor, read_opaque, [THIS, THAT, THIS]))
+
+    assert_that(future.result(), is_(equal_to(VALUE)))
+    assert_that(results, is_(equal_to([VALUE, OTHER, VALUE])))
+
+
+def test_process_executor_spawn():
+    """
+    Spawned workers rehydrate opaque data into instances that are created at import time.
+
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        with EXECUTOR_OPAQUE.initialize(example_func, VALUE, OTHER):
+            results = list(EXECUTOR_OPAQUE.map(executor, read_opaque, [THIS, THAT]))
+
+        # an instance that only exists in the parent process cannot be rehydrated
+        opaque = Opaque(name="parent-only")
+        future = opaque.submit(executor, read_opaque, THIS)
+
+    assert_that(results, is_(equal_to([VALUE, OTHER])))
+    assert_that(calling(future.result), raises(LookupError))
+
+
+def test_process_executor_requires_name():
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        assert_that(
+            calling(Opaque().submit).with_args(executor, read_opaque, THIS),
+            raises(ValueError),
+        )
+
+
 # set up a parent collaborator that uses a child collaborator
 @binding("parent_collaborator")
 class Parent:
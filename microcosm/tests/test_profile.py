@@ -0,0 +1,137 @@
+"""
+Profiling tests.
+
+"""
+from threading import Event
+
+from hamcrest import (
+    assert_that,
+    calling,
+    close_to,
+    contains_exactly,
+    contains_string,
+    empty,
+    has_items,
+    has_length,
+    is_,
+    raises,
+)
+
+from microcosm.object_graph import create_object_graph
+from microcosm.profile import (
+    CriticalPathReport,
+    ResolutionProfiler,
+    TimingProfiler,
+    WatchdogProfiler,
+)
+from microcosm.registry import Registry
+
+
+def test_critical_path():
+    # app depends on db and cache; db depends on config
+    report = CriticalPathReport(
+        dependencies=dict(
+            app=["db", "cache"],
+            db=["config"],
+            cache=[],
+            config=[],
+        ),
+        self_times=dict(
+            app=1.0,
+            db=3.0,
+            cache=2.0,
+            config=1.0,
+        ),
+    )
+
+    assert_that(report.path, contains_exactly("config", "db", "app"))
+    assert_that(report.parallel_time, is_(close_to(5.0, 1e-9)))
+    assert_that(report.serial_time, is_(close_to(7.0, 1e-9)))
+    assert_that(report.earliest_start["app"], is_(close_to(4.0, 1e-9)))
+    assert_that(report.slack["cache"], is_(close_to(2.0, 1e-9)))
+    assert_that(report.slack["db"], is_(close_to(0.0, 1e-9)))
+    assert_that(str(report).splitlines()[0], is_("serial time: 7.00000000"))
+
+
+def test_critical_path_ignores_unresolved_dependencies():
+    report = CriticalPathReport(
+        dependencies=dict(app=["assigned"]),
+        self_times=dict(app=1.0),
+    )
+
+    assert_that(report.path, contains_exactly("app"))
+    assert_that(report.parallel_time, is_(close_to(1.0, 1e-9)))
+
+
+def test_critical_path_from_graph():
+    registry = Registry()
+    registry.bind("child", lambda graph: "child")
+    registry.bind("parent", lambda graph: ("parent", graph.child))
+
+    graph = create_object_graph("test", registry=registry, profiler=ResolutionProfiler())
+    graph.use("parent")
+    report = CriticalPathReport.from_graph(graph)
+
+    assert_that(report.path, contains_exactly("child", "parent"))
+
+
+def test_critical_path_requires_self_times():
+    graph = create_object_graph("test", registry=Registry())
+
+    assert_that(
+        calling(CriticalPathReport.from_graph).with_args(graph),
+        raises(ValueError),
+    )
+
+
+def test_watchdog_reports_innermost_slow_factory():
+    reports = []
+    watchdog = WatchdogProfiler(budget=0.0, report=reports.append, interval=60, profiler=TimingProfiler())
+
+    registry = Registry()
+    registry.bind("fast", lambda graph: "fast")
+    registry.bind("child", lambda graph: (watchdog.check(), watchdog.check()))
+    registry.bind("parent", lambda graph: (graph.fast, graph.child, watchdog.check(), watchdog.check()))
+
+    graph = create_object_graph("test", registry=registry, profiler=watchdog)
+    try:
+        graph.use("parent")
+    finally:
+        watchdog.stop()
+
+    # the parent was not reported while its slow child was in flight, but was once it stayed slow
+    assert_that(reports, has_length(2))
+    assert_that(reports[0].key, is_("child"))
+    assert_that(reports[0].parents, contains_exactly("parent"))
+    assert_that(reports[0].stack, contains_string("watchdog.check()"))
+    assert_that(reports[1].key, is_("parent"))
+    assert_that(reports[1].parents, is_(empty()))
+    assert_that(watchdog.in_flight, is_(empty()))
+    assert_that(watchdog.profiler.times, has_items("fast", "child", "parent"))
+
+
+def test_watchdog_ignores_fast_factories():
+    watchdog = WatchdogProfiler(budget=60, report=lambda slow_factory: None)
+
+    registry = Registry()
+    registry.bind("fast", lambda graph: watchdog.check())
+
+    graph = create_object_graph("test", registry=registry, profiler=watchdog)
+    try:
+        assert_that(graph.fast, is_(empty()))
+    finally:
+        watchdog.stop()
+
+
+def test_watchdog_monitor():
+    reported = Event()
+    watchdog = WatchdogProfiler(budget=0.01, report=lambda slow_factory: reported.set(), interval=0.01)
+
+    registry = Registry()
+    registry.bind("slow", lambda graph: reported.wait(5))
+
+    graph = create_object_graph("test", registry=registry, profiler=watchdog)
+    try:
+        assert_that(graph.slow, is_(True))
+    finally:
+        watchdog.stop()
@@ -2,14 +2,27 @@
 Test binding scoping.
 
 """
+from asyncio import gather, run, sleep
+from concurrent.futures import ThreadPoolExecutor
+from gc import collect
+from threading import Barrier, Thread
+from types import MethodType
+from weakref import ref
+
 from hamcrest import (
     assert_that,
+    contains_inanyorder,
     equal_to,
+    has_key,
+    has_length,
     instance_of,
     is_,
+    is_not,
+    none,
 )
 
 from microcosm.api import create_object_graph, defaults, load_from_dict
+from microcosm.registry import Registry
 from microcosm.scoping import ScopedFactory, scoped_binding
 
 
@@ -86,6 +99,235 @@ def test_scoped():
     helper(3, scope="baz")
 
 
+def test_concurrent_scopes():
+    """
+    Threads (and asyncio tasks) can use different scopes concurrently.
+
+    """
+    loader = load_from_dict(
+        bar=dict(
+            adder=dict(
+                first=3,
+            ),
+        ),
+    )
+    graph = create_object_graph("example", testing=True, loader=loader)
+    graph.use("adder")
+    barrier = Barrier(2)
+
+    def add_in_thread(scope):
+        with graph.adder.scoped_to(scope):
+            barrier.wait()
+            return graph.adder()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(add_in_thread, ["bar", None]))
+
+    assert_that(results, is_(equal_to([5, 3])))
+
+    async def add_in_task(scope):
+        with graph.adder.scoped_to(scope):
+            await sleep(0)
+            return graph.adder()
+
+    async def add_in_tasks():
+        return await gather(add_in_task("bar"), add_in_task(None))
+
+    assert_that(run(add_in_tasks()), is_(equal_to([5, 3])))
+    assert_that(graph.adder(), is_(equal_to(3)))
+
+
+def test_proxy_caching():
+    """
+    Proxies cache components (and optionally bound methods) per scope.
+
+    """
+    class Greeter:
+        def __init__(self, graph):
+            self.greeting = graph.config.greeter.greeting
+
+        def greet(self):
+            return self.greeting
+
+    registry = Registry()
+    scoped_binding("greeter", registry=registry, cache_methods=True)(
+        defaults(greeting="hello")(Greeter),
+    )
+    loader = load_from_dict(
+        bar=dict(
+            greeter=dict(
+                greeting="hi",
+            ),
+        ),
+    )
+    graph = create_object_graph("example", testing=True, loader=loader, registry=registry)
+
+    with graph.greeter.scoped_to("bar"):
+        assert_that(graph.greeter.greet(), is_(equal_to("hi")))
+        assert_that(graph.greeter.greeting, is_(equal_to("hi")))
+    assert_that(graph.greeter.greet(), is_(equal_to("hello")))
+
+    assert_that(graph.greeter.__methods__[("bar", "greet")], is_(instance_of(MethodType)))
+    assert_that(graph.greeter.__methods__[(None, "greet")], is_(instance_of(MethodType)))
+    assert_that(graph.greeter.__methods__, is_not(has_key(("bar", "greeting"))))
+    assert_that(graph.greeter.__components__["bar"], is_(equal_to(("bar.greeter", graph.get("bar.greeter")))))
+    assert_that(graph.greeter.scoped_to, is_(instance_of(MethodType)))
+
+    # replaced components are not cached
+    replacement = Greeter.__new__(Greeter)
+    replacement.greeting = "hey"
+    graph.assign(".greeter", replacement)
+    assert_that(graph.greeter.greet(), is_(equal_to("hey")))
+    with graph.greeter.scoped_to("bar"):
+        assert_that(graph.greeter.greet(), is_(equal_to("hi")))
+
+
+def test_assign_replaces_component():
+    """
+    Proxies use components that are assigned to the graph.
+
+    """
+    graph = create_object_graph("example", testing=True)
+    assert_that(graph.adder(), is_(equal_to(3)))
+
+    graph.assign(".adder", lambda: 42)
+    assert_that(graph.adder(), is_(equal_to(42)))
+
+
+def test_scoped_config_is_memoized():
+    """
+    Scoped configuration is computed once per scope.
+
+    """
+    loader = load_from_dict(
+        bar=dict(
+            adder=dict(
+                first=3,
+            ),
+        ),
+    )
+    graph = create_object_graph("example", testing=True, loader=loader)
+    factory = graph.factory_for("adder")
+
+    with factory.scoped_to("bar"):
+        scoped_graph = factory.get_scoped_graph(graph)
+        assert_that(factory.get_scoped_graph(graph), is_(scoped_graph))
+        assert_that(factory.get_scoped_config(graph), is_(scoped_graph.config))
+        assert_that(scoped_graph.config.adder.first, is_(equal_to(3)))
+
+    assert_that(factory.get_scoped_config(graph).adder.first, is_(equal_to(1)))
+    with factory.scoped_to(""):
+        assert_that(factory.get_scoped_graph(graph), is_(factory.get_scoped_graph(graph)))
+        assert_that(factory.get_scoped_config(graph).adder.first, is_(equal_to(1)))
+
+    # scoped graphs are not shared between graphs
+    other_graph = create_object_graph("example", testing=True, loader=loader)
+    assert_that(factory.get_scoped_graph(other_graph), is_not(factory.get_scoped_graph(graph)))
+
+
+def test_scoped_graphs_do_not_outlive_graph():
+    """
+    Memoized scoped graphs do not keep their graph alive.
+
+    """
+    graph = create_object_graph("example", testing=True)
+    assert_that(graph.adder(), is_(equal_to(3)))
+    graph_ref = ref(graph)
+
+    del graph
+    collect()
+    assert_that(graph_ref(), is_(none()))
+
+
+def test_materialize():
+    """
+    Scoped components can be created eagerly (and concurrently) for all scopes.
+
+    """
+    created = []
+    barrier = Barrier(3, timeout=5)
+
+    class Tenant:
+        def __init__(self, graph):
+            # resolve a shared component from every (non-default) scope at once
+            self.shared = graph.shared
+            self.name = graph.config.tenant.name
+            if self.name != "default":
+                barrier.wait()
+            created.append(self.name)
+
+    def create_shared(graph):
+        created.append("shared")
+        return object()
+
+    registry = Registry()
+    registry.bind("shared", create_shared)
+    scoped_binding("tenant", registry=registry)(defaults(name="default")(Tenant))
+    loader = load_from_dict(
+        foo=dict(tenant=dict(name="foo")),
+        bar=dict(tenant=dict(name="bar")),
+        baz=dict(tenant=dict(name="baz")),
+        other=dict(value=1),
+    )
+    graph = create_object_graph("example", testing=True, loader=loader, registry=registry)
+    factory = graph.factory_for("tenant")
+    reports = []
+
+    timings = factory.materialize(
+        graph,
+        max_workers=3,
+        progress=lambda *args: reports.append(args),
+    )
+
+    assert_that(factory.discover_scopes(graph), contains_inanyorder("foo", "bar", "baz"))
+    assert_that(timings, has_length(3))
+    assert_that(created, contains_inanyorder("shared", "foo", "bar", "baz"))
+    assert_that([report[2] for report in reports], is_(equal_to([1, 2, 3])))
+
+    with graph.tenant.scoped_to("bar"):
+        assert_that(graph.tenant.name, is_(equal_to("bar")))
+        assert_that(graph.tenant.shared, is_(graph.shared))
+    # only the default scope was created on demand
+    assert_that(created, contains_inanyorder("shared", "foo", "bar", "baz", "default"))
+
+
+def test_materialize_from_factory():
+    """
+    Scoped components can be materialized from within a factory.
+
+    """
+    class Tenant:
+        def __init__(self, graph):
+            self.shared = graph.shared
+            self.name = graph.config.tenant.name
+
+    def create_tenants(graph):
+        factory = graph.factory_for("tenant")
+        factory.materialize(graph, max_workers=2)
+        return graph.tenant
+
+    registry = Registry()
+    registry.bind("shared", lambda graph: object())
+    registry.bind("tenants", create_tenants)
+    scoped_binding("tenant", registry=registry)(defaults(name="default")(Tenant))
+    loader = load_from_dict(
+        foo=dict(tenant=dict(name="foo")),
+        bar=dict(tenant=dict(name="bar")),
+    )
+    graph = create_object_graph("example", testing=True, loader=loader, registry=registry)
+
+    results = []
+    thread = Thread(target=lambda: results.append(graph.tenants), daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert_that(thread.is_alive(), is_(equal_to(False)))
+    assert_that(graph.get("foo.tenant").name, is_(equal_to("foo")))
+    assert_that(graph.get("bar.tenant").shared, is_(graph.shared))
+    with results[0].scoped_to("foo"):
+        assert_that(results[0].name, is_(equal_to("foo")))
+
+
 def test_infect_entry_point():
     """
     Entry points can be converted to ScopedFactories after-the-fact.